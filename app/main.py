@@ -10,13 +10,23 @@ import re
 import asyncio
 import logging
 import base64
+import gzip
+import hashlib
+import bisect
+import heapq
+import json
+import sqlite3
+import sys
+import time
+import itertools
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, AsyncIterator, Sequence, Callable, Tuple, Awaitable
 from contextlib import asynccontextmanager
 
 import httpx
 from fastapi import FastAPI, Request, Query, HTTPException, Response
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -56,14 +66,27 @@ def safe_int(value: str, default: int, min_val: int = 0, max_val: int = 99999999
 
 
 # ============ 配置 ============
-MT_API_BASE = "https://api.m-team.io/api"
+MT_API_BASE = os.getenv("MT_API_BASE", "https://api.m-team.io/api").rstrip("/")
 MT_SEARCH_URL = f"{MT_API_BASE}/torrent/search"
 MT_CATEGORY_URL = f"{MT_API_BASE}/torrent/categoryList"
 MT_TOKEN = os.getenv("MT_TOKEN", "")
 MT_USER_ID = os.getenv("MT_USER_ID", "")
 REFRESH_INTERVAL = safe_int(os.getenv("REFRESH_INTERVAL", "600"), 600, min_val=60, max_val=86400)
+# 下载中种子快速巡检间隔（秒），0 表示关闭，最小 10 秒
+WATCHDOG_INTERVAL = safe_int(os.getenv("WATCHDOG_INTERVAL", "30"), 30, min_val=0, max_val=3600)
+if WATCHDOG_INTERVAL:
+    WATCHDOG_INTERVAL = max(WATCHDOG_INTERVAL, 10)
 MT_SITE_URL = os.getenv("MT_SITE_URL", "https://kp.m-team.cc")
 API_DELAY = max(0.5, min(float(os.getenv("API_DELAY", "1") or "1"), 10))  # API请求间隔（秒），限制0.5-10秒
+API_BURST = safe_int(os.getenv("API_BURST", "3"), 3, min_val=1, max_val=20)  # 令牌桶容量：允许的短时突发请求数
+MT_PAGE_SIZE = 200  # 分页接口每页数量（M-Team 接口上限）
+MT_MAX_PAGES = 100  # 单个分页查询最多翻页数，防止异常响应导致无限翻页
+TORRENTS_MAX_LIMIT = 1000  # /api/torrents 单页最多返回数量
+# 仪表盘外壳模式：首页不内嵌种子数据，由浏览器从 /api/torrents 加载（页面可长期缓存）
+DASHBOARD_SHELL = os.getenv("DASHBOARD_SHELL", "false").lower() in ("1", "true", "yes")
+# 多账号配置文件（JSON 数组，见 load_accounts），留空则由 MT_TOKEN 等环境变量组成单个 default 账号
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "")
+ACCOUNT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
 
 # API URLs
 MT_COLLECTION_URL = f"{MT_API_BASE}/torrent/collection"
@@ -79,12 +102,21 @@ PUSHPLUS_TOKEN = os.getenv("PUSHPLUS_TOKEN", "")
 PUSHPLUS_URL = "http://www.pushplus.plus/send"
 ALERT_THRESHOLD_MINUTES = 10  # 免费即将到期报警阈值（分钟）
 ALERT_COOLDOWN = 1800  # 30分钟内不重复报警同一种子
+# 按报警类型的冷却时间（秒），未列出的类型使用 ALERT_COOLDOWN
+ALERT_COOLDOWNS = {
+    "expiring": safe_int(os.getenv("ALERT_COOLDOWN_EXPIRING", str(ALERT_COOLDOWN)), ALERT_COOLDOWN, min_val=0, max_val=86400),
+    "changed": safe_int(os.getenv("ALERT_COOLDOWN_CHANGED", str(ALERT_COOLDOWN)), ALERT_COOLDOWN, min_val=0, max_val=86400),
+}
 
 # qBittorrent 配置
 QBITTORRENT_URL = os.getenv("QBITTORRENT_URL", "")
 QBITTORRENT_USER = os.getenv("QBITTORRENT_USER", "")
 QBITTORRENT_PASSWORD = os.getenv("QBITTORRENT_PASSWORD", "")
 
+# 状态持久化（SQLite），留空则不持久化
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "data/state.db")
+STATE_FLUSH_INTERVAL = 5  # 状态批量写回间隔（秒）
+
 # 北京时区 (UTC+8)
 BEIJING_TZ = timezone(timedelta(hours=8))
 
@@ -94,53 +126,480 @@ USER_AGENT = (
     "Chrome/120.0.0.0 Safari/537.36"
 )
 
-# ============ 全局状态 ============
-cached_data: Dict[str, Any] = {
-    "torrents": [],
-    "categories": [],
-    "last_update": None,
-    "error": None
-}
+# ============ 有界容器 ============
+class ExpiringSet:
+    """
+    带过期时间和容量上限的集合
 
-user_torrent_status: Dict[str, Dict] = {
-    "seeding": {},
-    "leeching": {},
-}
+    每个成员记录过期时间戳，过期成员在查询时视为不存在；成员另按过期时间存入最小堆，
+    过期清理和超出容量时的淘汰（最早过期者优先）都只弹出堆顶，每次加入的均摊复杂度为 O(log n)。
+    过期时间被延长后旧的堆条目惰性丢弃，堆中无效条目过多时整体重建。
+    """
 
-user_collection_ids: set = set()
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expires: Dict[str, float] = {}
+        self._heap: List[Any] = []  # (过期时间戳, key)
+
+    def add(self, key: str, expires_at: Optional[float] = None) -> None:
+        """加入成员，过期时间取 now + ttl 与 expires_at 的较大者，且不会缩短已有的过期时间"""
+        now = datetime.now().timestamp()
+        expires = max(now + self.ttl, expires_at or 0, self._expires.get(key, 0))
+        if self._expires.get(key) != expires:
+            self._expires[key] = expires
+            heapq.heappush(self._heap, (expires, key))
+        self._evict(now)
+
+    def __contains__(self, key: object) -> bool:
+        expires = self._expires.get(key)  # type: ignore[arg-type]
+        return expires is not None and expires > datetime.now().timestamp()
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def _evict(self, now: float) -> int:
+        """弹出已过期的成员，以及超出容量上限时最早过期的成员，返回清除数量"""
+        removed = 0
+        while self._heap and (self._heap[0][0] <= now or len(self._expires) > self.max_size):
+            expires, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires:
+                del self._expires[key]
+                removed += 1
+
+        # 过期时间被延长的成员会留下无效的堆条目，超过有效条目数一倍时重建
+        if len(self._heap) > 2 * len(self._expires) + 1024:
+            self._heap = [(expires, key) for key, expires in self._expires.items()]
+            heapq.heapify(self._heap)
+        return removed
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """清除过期成员并按容量上限淘汰，返回清除数量"""
+        return self._evict(now or datetime.now().timestamp())
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(self._expires)
+
+    def load(self, data: Dict[str, float]) -> None:
+        """从持久化数据恢复（值为过期时间戳）"""
+        for key, expires in data.items():
+            self._expires[str(key)] = max(float(expires), self._expires.get(str(key), 0))
+        self._heap = [(expires, key) for key, expires in self._expires.items()]
+        heapq.heapify(self._heap)
+        self.prune()
+
+
+class AlertCooldownTracker:
+    """
+    报警冷却记录
 
-user_profile: Dict[str, Any] = {
-    "share_ratio": 0,
-    "uploaded": 0,
-    "downloaded": 0,
-    "uploaded_display": "0 B",
-    "downloaded_display": "0 B"
-}
+    以 {torrent_id_alerttype: 冷却结束时间戳} 记录已发送的报警，并用最小堆按到期顺序惰性清理，
+    每次检查的均摊复杂度为 O(log n)，不再遍历全部记录。
+    """
+
+    def __init__(self, cooldowns: Dict[str, int], default_cooldown: int):
+        self.cooldowns = cooldowns
+        self.default_cooldown = default_cooldown
+        self._expires: Dict[str, float] = {}
+        self._heap: List[Any] = []  # (冷却结束时间戳, key)
+
+    def _evict(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            expires, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires:
+                del self._expires[key]
+
+    def try_acquire(self, torrent_id: str, alert_type: str) -> bool:
+        """不在冷却期内则记录本次报警并返回 True"""
+        now = datetime.now().timestamp()
+        self._evict(now)
+
+        key = f"{torrent_id}_{alert_type}"
+        if key in self._expires:
+            return False
+
+        self._set(key, now + self.cooldowns.get(alert_type, self.default_cooldown))
+        return True
+
+    def _set(self, key: str, expires: float) -> None:
+        self._expires[key] = expires
+        heapq.heappush(self._heap, (expires, key))
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(self._expires)
+
+    def load(self, data: Dict[str, float]) -> None:
+        """从持久化数据恢复（值为冷却结束时间戳）"""
+        now = datetime.now().timestamp()
+        for key, expires in data.items():
+            if expires > now:
+                self._set(key, float(expires))
+
+
+class ResponseCache:
+    """
+    按快照版本缓存的序列化响应（LRU，容量有上限）
+
+    每个条目保存原始字节、gzip 预压缩字节（较大的响应）和基于内容哈希的强 ETag。
+    键的第一项为账号名，账号的快照版本变化时只清空该账号的条目，旧版本的条目不会再被命中。
+    """
+
+    GZIP_MIN_SIZE = 1024
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, Tuple[bytes, Optional[bytes], str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, key: Any, build: Callable[[], bytes]) -> Tuple[bytes, Optional[bytes], str]:
+        """返回 (body, gzip_body, etag)，未命中时调用 build() 生成并缓存"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        body = build()
+        gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= self.GZIP_MIN_SIZE else None
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        entry = (body, gzip_body, etag)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """清空缓存；指定 namespace 时只清空键第一项等于它的条目"""
+        if namespace is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == namespace]:
+            del self._entries[key]
+
+
+class SearchCache:
+    """
+    各 (discount, mode) 搜索组合的原始结果，由所有账号共享
+
+    免费种子搜索结果与账号无关，每个组合在有效期内只抓取一次：第一个需要它的账号用自己的
+    限速预算完成抓取，同时刷新的其他账号等待同一次抓取，之后的账号直接复用结果。
+    只缓存完整翻页的结果，中途失败的抓取只返回给本轮等待者。
+    """
+
+    def __init__(self):
+        # {(discount, mode): (抓取完成时间, items, stats)}
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[Dict], Dict[str, Any]]] = {}
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task"] = {}
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(len(items) for _, items, _ in self._entries.values())
+
+    async def get(
+        self,
+        key: Tuple[str, str],
+        max_age: float,
+        crawl: Callable[[], Awaitable[Tuple[List[Dict], Dict[str, Any], bool]]]
+    ) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        返回 (items, stats)
+
+        有不超过 max_age 秒的结果时直接返回；有进行中的抓取时等待它；否则调用 crawl()，
+        crawl 返回 (items, stats, complete)，complete 为 False 时不缓存。
+        """
+        entry = self._entries.get(key)
+        if entry is not None and datetime.now().timestamp() - entry[0] <= max_age:
+            self.hits += 1
+            return entry[1], entry[2]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.joined += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._crawl(key, crawl))
+            self._inflight[key] = task
+        # 某个等待者被取消时不影响共享的抓取
+        return await asyncio.shield(task)
+
+    async def _crawl(
+        self,
+        key: Tuple[str, str],
+        crawl: Callable[[], Awaitable[Tuple[List[Dict], Dict[str, Any], bool]]]
+    ) -> Tuple[List[Dict], Dict[str, Any]]:
+        try:
+            items, stats, complete = await crawl()
+            if complete:
+                self._entries[key] = (datetime.now().timestamp(), items, stats)
+            return items, stats
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# ============ 指标 ============
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: Optional[Tuple[str, str]] = None) -> str:
+    """格式化 Prometheus 标签，如 {endpoint="torrent/search",le="0.5"}"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值（整数不带小数，避免 :g 截断大数）"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """单调递增计数器（按标签值分组）"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """累积分桶直方图（按标签值分组）"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], List[float]] = {}  # {标签值: [各桶计数..., sum, count]}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._values.get(label_values)
+        if series is None:
+            series = self._values[label_values] = [0.0] * (len(self.buckets) + 2)
+        bucket = bisect.bisect_left(self.buckets, value)
+        if bucket < len(self.buckets):
+            series[bucket] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @asynccontextmanager
+    async def time(self, *label_values: str) -> AsyncIterator[None]:
+        """async with 计时，结束（含异常）时记录耗时（秒）"""
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start_time, *label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, ("le", f"{bound:g}"))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labels, label_values, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {_format_value(series[-1])}")
+        return lines
+
+
+def render_samples(
+    name: str,
+    help_text: str,
+    samples: Dict[Tuple[Tuple[str, str], ...], float],
+    metric_type: str = "gauge"
+) -> List[str]:
+    """渲染抓取时计算的样本，samples 为 {((标签名, 标签值), ...): 值}"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples.items():
+        names = [label for label, _ in labels]
+        label_values = [label_value for _, label_value in labels]
+        lines.append(f"{name}{_format_labels(names, label_values)} {_format_value(value)}")
+    return lines
+
+
+MT_REQUEST_SECONDS = Histogram(
+    "mteam_request_duration_seconds", "M-Team API request latency (excluding scheduler wait)", ["endpoint"]
+)
+MT_SCHEDULER_WAIT_SECONDS = Histogram(
+    "mteam_scheduler_wait_seconds", "Time spent waiting for the M-Team request scheduler", ["priority"]
+)
+MT_RATE_LIMITED = Counter(
+    "mteam_rate_limited_total", "M-Team responses recognised as rate limiting", ["account", "endpoint"]
+)
+MT_REQUEST_ERRORS = Counter("mteam_request_errors_total", "M-Team requests that raised or returned an error", ["endpoint"])
+MT_PAGES_FETCHED = Counter("mteam_pages_fetched_total", "Pages fetched from paginated M-Team endpoints", ["endpoint"])
+SEARCH_SECONDS = Histogram("search_duration_seconds", "Duration of a full search crawl", ["discount", "mode"])
+QB_LOOKUP_SECONDS = Histogram(
+    "qbittorrent_lookup_duration_seconds", "Duration of qb_find_torrent_by_mteam_id", ["result"]
+)
+QB_DELETE_SECONDS = Histogram("qbittorrent_delete_duration_seconds", "Duration of qBittorrent delete requests", ["result"])
+EMERGENCY_CHECK_SECONDS = Histogram("emergency_check_duration_seconds", "Duration of check_emergency_alerts")
+REFRESH_SECONDS = Histogram(
+    "refresh_duration_seconds", "Duration of a full scheduled refresh", ["account"],
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+REFRESH_STAGE_SECONDS = Histogram("refresh_stage_duration_seconds", "Duration of each refresh pipeline stage", ["stage"])
+ALERTS = Counter(
+    "alerts_total", "Alerts by type and outcome (triggered, suppressed by cooldown, sent, failed)",
+    ["account", "type", "outcome"]
+)
+HTTP_RATE_LIMITED = Counter("http_rate_limited_total", "Requests rejected by this server's rate limiter")
+
+# 下载中种子剩余免费时间分布的分桶（小时）
+LEECHING_REMAINING_BUCKETS = (0.1667, 0.5, 1, 2, 6, 24, 72)
 
-rival_profile: Dict[str, Any] = {
-    "share_ratio": 0,
-    "uploaded": 0,
-    "downloaded": 0,
-    "uploaded_display": "0 B",
-    "downloaded_display": "0 B"
-}
 
+# ============ 全局状态 ============
 # 历史免费种子ID追踪（用于检测"变节"- 免费变收费）
-known_free_torrent_ids: set = set()
+# 保留到 max(最后一次看到 + KNOWN_FREE_TTL, 免费结束时间 + KNOWN_FREE_TTL)，避免无限增长
+KNOWN_FREE_TTL = 7 * 86400
+KNOWN_FREE_MAX = 50000
+
+# 序列化响应缓存（所有账号共享，键中包含账号名和该账号的快照版本）
+RESPONSE_CACHE_MAX_ENTRIES = 256
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
 
-# 已发送报警记录（防止重复报警）
-sent_alerts: Dict[str, float] = {}  # {torrent_id_alerttype: timestamp}
+# 搜索结果缓存（所有账号共享，每个搜索组合每轮只抓取一次，见 search_cache_max_age）
+search_cache = SearchCache()
 
-# 自动删除功能状态
-auto_delete_enabled: bool = False
+WARMING_RELOAD_SECONDS = 15  # 预热期间页面自动重新加载间隔
 
-# 全局 HTTP 客户端（复用连接池）
+# 全局 HTTP 客户端（复用连接池，所有账号共享）
 http_client: Optional[httpx.AsyncClient] = None
 
-# qBittorrent 会话缓存（避免重复登录导致的问题）
-qb_cached_sid: Optional[str] = None
-qb_sid_created_at: Optional[float] = None
+# qBittorrent 会话配置（每个 qBittorrent 实例一个会话，见 get_qb_session）
 QB_SESSION_MAX_AGE = 1800  # 会话最大有效期（秒），设为30分钟，比qB的1小时超时更保守
+QB_MAX_CONCURRENCY = safe_int(os.getenv("QB_MAX_CONCURRENCY", "8"), 8, min_val=1, max_val=64)  # 同时进行的 qB 请求数上限
+QB_INDEX_MIN_SYNC_INTERVAL = 5  # 索引未命中时两次同步的最小间隔（秒），避免同一轮检查重复拉取列表
+
+
+def empty_profile() -> Dict[str, Any]:
+    """尚未获取时的用户资料"""
+    return {
+        "share_ratio": 0,
+        "uploaded": 0,
+        "downloaded": 0,
+        "uploaded_display": "0 B",
+        "downloaded_display": "0 B"
+    }
+
+
+class Account:
+    """
+    一个 M-Team 账号的配置与运行时状态
+
+    每个账号有自己的令牌、刷新间隔、限速预算（MTeamScheduler）、qBittorrent 目标、
+    种子快照、报警记录和事件订阅者，在同一进程内独立刷新；HTTP 客户端、响应缓存和状态数据库
+    由所有账号共享，指向同一 qBittorrent 实例的账号共享会话、状态镜像和索引。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        token: str,
+        user_id: str = "",
+        rival_user_id: str = "",
+        qb: Optional["QBittorrentSession"] = None,
+        refresh_interval: int = REFRESH_INTERVAL,
+        api_delay: float = API_DELAY,
+        api_burst: int = API_BURST,
+        pushplus_token: str = PUSHPLUS_TOKEN,
+    ):
+        self.name = name
+        self.token = token.strip()
+        self.user_id = str(user_id or "")
+        self.rival_user_id = str(rival_user_id or "")
+        self.refresh_interval = refresh_interval
+        self.pushplus_token = pushplus_token
+        # 状态数据库键按账号名区分（与账号在配置中的位置无关）
+        self.state_prefix = f"{name}:"
+
+        self.scheduler = MTeamScheduler(rate=1 / api_delay, capacity=api_burst)
+        self.qb = qb or QBittorrentSession("", "", "")
+        self.expiry_scheduler = ExpiryScheduler()
+        self.event_broker = EventBroker(STREAM_QUEUE_SIZE, STREAM_MAX_SUBSCRIBERS)
+
+        self.cached_data: Dict[str, Any] = {
+            "torrents": [],
+            "categories": [],
+            "last_update": None,
+            "error": None
+        }
+        self.user_torrent_status: Dict[str, Dict] = {
+            "seeding": {},
+            "leeching": {},
+        }
+        self.user_collection_ids: set = set()
+        self.user_profile = empty_profile()
+        self.rival_profile = empty_profile()
+
+        self.known_free_torrent_ids = ExpiringSet(ttl=KNOWN_FREE_TTL, max_size=KNOWN_FREE_MAX)
+        # 已发送报警记录（防止重复报警）
+        self.sent_alerts = AlertCooldownTracker(ALERT_COOLDOWNS, ALERT_COOLDOWN)
+        self.auto_delete_enabled = False
+
+        # 当前快照的列式索引（随 cached_data["torrents"] 一起替换）
+        self.torrent_index: Optional[Any] = None
+        # 快照版本号（cached_data 每次替换或修改时递增，用于响应缓存和 ETag）
+        self.snapshot_version = 0
+        # 首次刷新完成时间（None 表示仍在预热，正在提供上次保存的快照或空数据）
+        self.last_refresh_completed_at: Optional[float] = None
+
+        # 搜索统计（每个 discount/mode 组合的页数、数量、耗时）
+        self.search_stats: Dict[str, Dict[str, Any]] = {}
+        # 刷新流水线各阶段耗时（秒）
+        self.refresh_stage_stats: Dict[str, float] = {}
+
+    def state_key(self, key: str) -> str:
+        """该账号在状态数据库中的键"""
+        return self.state_prefix + key
+
+    def mark_dirty(self, *keys: str) -> None:
+        """标记该账号需要写回的状态"""
+        state_store.mark_dirty(*(self.state_key(key) for key in keys))
+
 
 # ============ 模板配置 ============
 templates = Jinja2Templates(directory="app/templates")
@@ -155,243 +614,831 @@ async def get_http_client() -> httpx.AsyncClient:
     return http_client
 
 
-def get_headers() -> Dict[str, str]:
+class TokenBucket:
+    """
+    令牌桶限速器
+
+    以 rate 个/秒的速度补充令牌，最多积累 capacity 个；每次请求消耗一个令牌，
+    令牌不足时按先后顺序等待。
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None  # 在事件循环内延迟创建
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌"""
+        if self.updated_at is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """获取一个令牌，不足时等待"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            loop = asyncio.get_event_loop()
+            self._refill(loop.time())
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill(loop.time())
+            self.tokens -= 1
+
+
+# M-Team 请求优先级（数值越小越优先）
+MT_PRIORITY_EMERGENCY = 0  # 紧急路径：下载中种子状态
+MT_PRIORITY_INTERACTIVE = 1  # 用户操作：收藏/取消收藏
+MT_PRIORITY_NORMAL = 2  # 常规刷新：搜索、做种状态、收藏列表、用户资料
+MT_PRIORITY_LOW = 3  # 可延后：对手资料、类别列表
+
+MT_BACKOFF_MAX = 60  # 触发限流后的最长暂停时间（秒）
+MT_RATE_LIMIT_RETRIES = 2  # 触发限流后的重试次数
+MT_RATE_LIMIT_KEYWORDS = ("频繁", "頻繁", "too many", "rate limit")
+
+
+class MTeamScheduler:
+    """
+    M-Team API 请求调度器
+
+    每个账号一个调度器，该账号的所有 M-Team 请求共享一个令牌桶（速率 1/API_DELAY，容量 API_BURST）；
+    等待中的请求按优先级获得令牌；接口返回限流时暂停发放并降低速率，
+    之后每次成功请求逐步恢复到配置速率。
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.base_rate = rate
+        self.bucket = TokenBucket(rate, capacity)
+        self.backoff = 0.0
+        self.paused_until = 0.0
+        self.rate_limit_hits = 0
+        self._waiters: List[Any] = []  # 堆：(priority, seq, future)
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int = MT_PRIORITY_NORMAL) -> None:
+        """按优先级排队获取一个发送许可"""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """依次向优先级最高的等待者发放令牌，队列为空时退出"""
+        loop = asyncio.get_event_loop()
+        while self._waiters:
+            pause = self.paused_until - loop.time()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self.bucket.acquire()
+
+            # 跳过已取消的等待者，令牌交给下一个
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+    def record_rate_limited(self) -> None:
+        """触发限流：指数退避并将速率减半"""
+        loop = asyncio.get_event_loop()
+        self.rate_limit_hits += 1
+        self.backoff = min(max(self.backoff * 2, 1 / self.base_rate), MT_BACKOFF_MAX)
+        self.paused_until = loop.time() + self.backoff
+        self.bucket.rate = max(self.base_rate / 8, self.bucket.rate / 2)
+        logger.warning(f"M-Team API 触发限流，暂停 {self.backoff:.1f}秒，速率降至 {self.bucket.rate:.2f}/秒")
+
+    def record_success(self) -> None:
+        """请求成功：逐步恢复速率"""
+        self.backoff = 0.0
+        if self.bucket.rate < self.base_rate:
+            self.bucket.rate = min(self.base_rate, self.bucket.rate + self.base_rate / 10)
+
+
+def is_rate_limited(response: httpx.Response, data: Optional[Dict[str, Any]]) -> bool:
+    """判断 M-Team 响应是否为限流"""
+    if response.status_code == 429:
+        return True
+    if isinstance(data, dict) and data.get("code") != "0":
+        message = str(data.get("message") or "").lower()
+        return any(keyword in message for keyword in MT_RATE_LIMIT_KEYWORDS)
+    return False
+
+
+async def mt_post(account: "Account", url: str, priority: int = MT_PRIORITY_NORMAL, **kwargs) -> Dict[str, Any]:
+    """
+    经账号的调度器发送 M-Team POST 请求并返回解析后的 JSON
+
+    未指定 headers 时使用 get_headers(account)；触发限流时退避后重试。
+    网络或解析异常直接抛出，由调用方处理。
+    """
+    kwargs.setdefault("headers", get_headers(account))
+    endpoint = mt_endpoint(url)
+    scheduler = account.scheduler
+
+    for attempt in range(MT_RATE_LIMIT_RETRIES + 1):
+        async with MT_SCHEDULER_WAIT_SECONDS.time(str(priority)):
+            await scheduler.acquire(priority)
+        client = await get_http_client()
+        try:
+            async with MT_REQUEST_SECONDS.time(endpoint):
+                response = await client.post(url, **kwargs)
+        except Exception:
+            MT_REQUEST_ERRORS.inc(endpoint)
+            raise
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+
+        if is_rate_limited(response, data):
+            MT_RATE_LIMITED.inc(account.name, endpoint)
+            scheduler.record_rate_limited()
+            if attempt < MT_RATE_LIMIT_RETRIES:
+                continue
+        else:
+            scheduler.record_success()
+
+        if data is None or data.get("code") != "0":
+            MT_REQUEST_ERRORS.inc(endpoint)
+        if data is None:
+            response.raise_for_status()
+            raise ValueError(f"无法解析响应: {response.text[:100]}")
+        return data
+
+
+def mt_endpoint(url: str) -> str:
+    """M-Team 接口的指标标签，如 torrent/search"""
+    return url[len(MT_API_BASE) + 1:] if url.startswith(MT_API_BASE) else url
+
+
+def get_headers(account: "Account") -> Dict[str, str]:
     """获取 API 请求头"""
     return {
         "User-Agent": USER_AGENT,
-        "x-api-key": MT_TOKEN.strip(),
+        "x-api-key": account.token,
         "Content-Type": "application/json",
         "Accept": "application/json",
     }
 
 
-# ============ qBittorrent 辅助函数 ============
-def qb_clear_session():
-    """清除缓存的 qBittorrent 会话"""
-    global qb_cached_sid, qb_sid_created_at
-    qb_cached_sid = None
-    qb_sid_created_at = None
-    logger.debug("已清除 qBittorrent 缓存会话")
-
-
-def qb_is_session_valid() -> bool:
-    """检查缓存的会话是否仍然有效"""
-    global qb_cached_sid, qb_sid_created_at
-    if not qb_cached_sid or not qb_sid_created_at:
-        return False
+# ============ 状态持久化 ============
+class StateStore:
+    """
+    基于 SQLite（WAL 模式）的状态存储
 
-    elapsed = datetime.now().timestamp() - qb_sid_created_at
-    return elapsed < QB_SESSION_MAX_AGE
+    每个状态以 JSON 存为一行；修改时只标记脏键，由后台任务每 STATE_FLUSH_INTERVAL 秒
+    在一个事务中批量写入（write-behind），写入在线程中执行，不阻塞事件循环。
+    """
 
+    def __init__(self, path: str):
+        self.path = path
+        self.enabled = bool(path)
+        # 打开失败的原因（配置了路径但持久化不可用时，通过 /health 和 /ready 暴露）
+        self.error: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._dirty: set = set()
+
+    def open(self) -> None:
+        """打开数据库并建表，失败时禁用持久化并记录原因"""
+        if not self.enabled:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.warning(
+                f"打开状态数据库 {self.path} 失败，持久化已禁用（重启后状态会丢失）: {self.error}；"
+                f"请确认目录对运行用户 (uid={os.getuid()}) 可写"
+            )
+            self.enabled = False
+            self._conn = None
+
+    @property
+    def status(self) -> str:
+        """持久化状态：enabled、disabled（未配置路径）或 error（配置了路径但无法打开）"""
+        if self.error:
+            return "error"
+        return "enabled" if self.enabled else "disabled"
+
+    def load(self) -> Dict[str, Any]:
+        """读取全部状态"""
+        if not self._conn:
+            return {}
+        state = {}
+        for key, value in self._conn.execute("SELECT key, value FROM state"):
+            try:
+                state[key] = json.loads(value)
+            except ValueError:
+                logger.warning(f"状态 {key} 已损坏，忽略")
+        return state
+
+    def mark_dirty(self, *keys: str) -> None:
+        """标记需要写回的状态"""
+        if self.enabled:
+            self._dirty.update(keys)
+
+    def _write(self, rows: List[Any]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value, updated_at) VALUES (?, ?, ?)", rows
+            )
 
-async def qb_login(force_new: bool = False) -> Optional[str]:
-    """
-    登录 qBittorrent Web UI（带会话缓存）
+    async def flush(self) -> None:
+        """批量写回脏状态"""
+        if not self._conn or not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+        now = datetime.now().timestamp()
+        # 在事件循环内取快照，序列化和写盘放到线程中
+        snapshots = [(key, get_state_snapshot(key)) for key in keys]
+        try:
+            rows = await asyncio.to_thread(
+                lambda: [(key, json.dumps(value, ensure_ascii=False), now) for key, value in snapshots]
+            )
+            await asyncio.to_thread(self._write, rows)
+        except Exception as e:
+            logger.error(f"写入状态数据库失败: {e}")
+            self._dirty.update(keys)
+
+    async def run(self) -> None:
+        """后台写回任务"""
+        while True:
+            await asyncio.sleep(STATE_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def close(self) -> None:
+        """写回剩余状态并关闭数据库"""
+        await self.flush()
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+
+state_store = StateStore(STATE_DB_PATH)
+
+
+def get_state_snapshot(key: str) -> Any:
+    """获取需要持久化的状态快照（可 JSON 序列化），key 形如 账号名:状态名"""
+    account_name, _, name = key.partition(":")
+    account = get_account(account_name)
+    if name == "known_free_torrent_ids":
+        return account.known_free_torrent_ids.to_dict()
+    if name == "alert_cooldowns":
+        return account.sent_alerts.to_dict()
+    if name == "cached_data":
+        cached_data = account.cached_data
+        return {**cached_data, "torrents": [t.to_dict() for t in cached_data.get("torrents", [])]}
+    if name == "auto_delete_enabled":
+        return account.auto_delete_enabled
+    if name == "qb_index":
+        return dict(account.qb.hash_to_mteam)
+    raise KeyError(key)
+
+
+def restore_state() -> None:
+    """启动时从状态数据库恢复所有账号的状态"""
+    state_store.open()
+    start_time = datetime.now().timestamp()
+    state = state_store.load()
+    if not state:
+        return
 
-    Args:
-        force_new: 是否强制重新登录（忽略缓存）
+    for account in accounts.values():
+        def get(key: str) -> Any:
+            return state.get(account.state_key(key))
 
-    Returns:
-        Optional[str]: 登录成功返回 SID cookie，失败返回 None
+        account.known_free_torrent_ids.load(get("known_free_torrent_ids") or {})
+
+        account.sent_alerts.load(get("alert_cooldowns") or {})
+
+        if get("cached_data"):
+            snapshot = get("cached_data")
+            snapshot["torrents"] = [TorrentRecord.from_dict(t) for t in snapshot.get("torrents") or []]
+            account.cached_data = snapshot
+            rebuild_torrent_index(account, snapshot["torrents"])
+            bump_snapshot_version(account)
+
+        account.auto_delete_enabled = bool(get("auto_delete_enabled") or account.auto_delete_enabled)
+
+        for torrent_hash, mteam_id in (get("qb_index") or {}).items():
+            qb_index_add(account.qb, torrent_hash, mteam_id)
+
+        logger.info(
+            f"[{account.name}] 已恢复状态: "
+            f"{len(account.cached_data.get('torrents', []))} 个缓存种子, "
+            f"{len(account.known_free_torrent_ids)} 个历史免费种子, "
+            f"{len(account.sent_alerts)} 条报警记录, 自动删除{'已启用' if account.auto_delete_enabled else '未启用'}"
+        )
+
+    elapsed = (datetime.now().timestamp() - start_time) * 1000
+    logger.info(f"已从 {state_store.path} 恢复 {len(accounts)} 个账号的状态（{elapsed:.0f}毫秒）")
+
+
+# ============ 事件推送 ============
+class EventBroker:
     """
-    global qb_cached_sid, qb_sid_created_at
+    向 /api/stream 的订阅者广播事件（Server-Sent Events）
 
-    if not QBITTORRENT_URL or not QBITTORRENT_USER or not QBITTORRENT_PASSWORD:
-        logger.debug("qBittorrent 配置不完整，跳过登录")
-        return None
+    每个事件只编码一次，同一份字节放入所有订阅者的队列；订阅者消费过慢导致队列写满时，
+    丢弃其积压事件并改发一个 reset 事件，由客户端重新拉取完整数据。
+    """
 
-    # 如果有有效的缓存会话且不是强制重新登录，直接返回
-    if not force_new and qb_is_session_valid():
-        logger.debug("使用缓存的 qBittorrent 会话")
-        return qb_cached_sid
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: set = set()
 
-    try:
-        # 创建新的 HTTP 客户端实例，避免 cookie 干扰
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{QBITTORRENT_URL.rstrip('/')}/api/v2/auth/login",
-                data={"username": QBITTORRENT_USER, "password": QBITTORRENT_PASSWORD},
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[asyncio.Queue]:
+        """新增订阅者，超过上限时返回 None"""
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> None:
+        if not self._subscribers:
+            return
+        message = encode_sse(event, data, event_id)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(encode_sse("snapshot", {"reset": True}, event_id))
+
+
+def encode_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    """编码为一条 SSE 消息"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+STREAM_QUEUE_SIZE = 64  # 每个订阅者最多积压的事件数
+STREAM_MAX_SUBSCRIBERS = 100  # /api/stream 同时连接数上限
+STREAM_HEARTBEAT = 20  # 心跳间隔（秒），防止代理断开空闲连接
+STREAM_MAX_DIFF = 500  # 单次刷新变化的种子数超过此值时只发送 reset，由客户端重新拉取
+
+
+# ============ qBittorrent 辅助函数 ============
+class QBittorrentSession:
+    """
+    qBittorrent Web API 长连接会话
+
+    复用同一个 httpx.AsyncClient（keep-alive 连接池 + cookie），
+    用信号量限制并发请求数，遇到 401/403 时自动重新登录并重试一次。
+    同时保存该实例的状态镜像（sync/maindata）和 M-Team ID 索引，指向同一实例的账号共用。
+    """
+
+    def __init__(self, base_url: str, username: str, password: str, max_concurrency: int = 8):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.max_concurrency = max_concurrency
+        self.sid: Optional[str] = None
+        self.sid_created_at: Optional[float] = None
+        self.sync_rid: int = 0  # sync/maindata 游标，与会话绑定
+        # 状态镜像（通过 sync/maindata 增量同步）
+        self.torrents: Dict[str, Dict[str, Any]] = {}  # {hash: 种子字段}
+        self.synced_at: Optional[float] = None
+        # 种子索引（M-Team ID -> infohash），增量维护，避免每次逐个查询 tracker
+        self.mteam_index: Dict[str, str] = {}
+        self.hash_to_mteam: Dict[str, Optional[str]] = {}  # {hash: mteam_id 或 None（非 M-Team 种子）}
+        self.index_synced_at: float = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+        # 锁和信号量在事件循环内延迟创建（Python 3.9 会在构造时绑定事件循环）
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._login_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def configured(self) -> bool:
+        """配置是否完整"""
+        return bool(self.base_url and self.username and self.password)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取或创建长连接客户端"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=10.0,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
             )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._login_lock = asyncio.Lock()
+        return self._client
+
+    def clear_session(self) -> None:
+        """清除缓存的会话"""
+        self.sid = None
+        self.sid_created_at = None
+        self.sync_rid = 0
+        if self._client is not None:
+            self._client.cookies.clear()
+        logger.debug("已清除 qBittorrent 缓存会话")
+
+    def is_session_valid(self) -> bool:
+        """检查缓存的会话是否仍然有效"""
+        if not self.sid or not self.sid_created_at:
+            return False
+
+        elapsed = datetime.now().timestamp() - self.sid_created_at
+        return elapsed < QB_SESSION_MAX_AGE
 
-            if response.text == "Ok.":
-                # 从 cookies 中提取 SID
-                sid = response.cookies.get("SID")
-                if sid:
-                    # 缓存会话
-                    qb_cached_sid = sid
-                    qb_sid_created_at = datetime.now().timestamp()
-                    logger.info("qBittorrent 登录成功（新会话）")
-                    return sid
+    async def login(self, force_new: bool = False) -> Optional[str]:
+        """
+        登录 qBittorrent Web UI（带会话缓存）
+
+        Args:
+            force_new: 是否强制重新登录（忽略缓存）
+
+        Returns:
+            Optional[str]: 登录成功返回 SID cookie，失败返回 None
+        """
+        if not self.configured:
+            logger.debug("qBittorrent 配置不完整，跳过登录")
+            return None
+
+        client = self._get_client()
+        stale_sid = self.sid
+
+        async with self._login_lock:
+            # 如果有有效的缓存会话且不是强制重新登录，直接返回
+            if not force_new and self.is_session_valid():
+                logger.debug("使用缓存的 qBittorrent 会话")
+                return self.sid
+
+            # 并发请求同时触发重新登录时，只登录一次
+            if force_new and self.sid and self.sid != stale_sid and self.is_session_valid():
+                return self.sid
+
+            try:
+                client.cookies.clear()
+                response = await client.post(
+                    "/api/v2/auth/login",
+                    data={"username": self.username, "password": self.password},
+                )
+
+                if response.text == "Ok.":
+                    # 从 cookies 中提取 SID
+                    sid = response.cookies.get("SID")
+                    if sid:
+                        # 缓存会话
+                        self.sid = sid
+                        self.sid_created_at = datetime.now().timestamp()
+                        self.sync_rid = 0
+                        client.cookies.set("SID", sid)
+                        logger.info("qBittorrent 登录成功（新会话）")
+                        return sid
+                    else:
+                        logger.warning("qBittorrent 登录成功但未获取到 SID")
+                        return None
                 else:
-                    logger.warning("qBittorrent 登录成功但未获取到 SID")
+                    logger.error(f"qBittorrent 登录失败: {response.text}")
+                    self.clear_session()  # 清除可能过期的缓存
                     return None
-            else:
-                logger.error(f"qBittorrent 登录失败: {response.text}")
-                qb_clear_session()  # 清除可能过期的缓存
+            except Exception as e:
+                logger.error(f"qBittorrent 登录异常: {e}")
+                self.clear_session()
                 return None
-    except Exception as e:
-        logger.error(f"qBittorrent 登录异常: {e}")
-        qb_clear_session()
-        return None
 
+    async def request(self, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """
+        发送带认证的请求，认证失效时自动重新登录并重试一次
+
+        Returns:
+            Optional[httpx.Response]: 认证失败或未配置时返回 None，网络异常直接抛出
+        """
+        if not await self.login():
+            return None
+
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.request(method, path, **kwargs)
+
+        if response.status_code in (401, 403):
+            logger.warning("qBittorrent 会话已过期，重新登录")
+            if not await self.login(force_new=True):
+                return None
+            async with self._semaphore:
+                response = await client.request(method, path, **kwargs)
+            if response.status_code in (401, 403):
+                self.clear_session()
+                return None
+
+        return response
+
+    async def aclose(self) -> None:
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# qBittorrent 会话（按 地址 + 用户名 复用，多个账号可指向同一实例）
+qb_sessions: Dict[Tuple[str, str], QBittorrentSession] = {}
+
+
+def get_qb_session(base_url: str, username: str, password: str) -> QBittorrentSession:
+    """获取或创建指定 qBittorrent 实例的会话"""
+    key = (base_url.rstrip('/'), username)
+    session = qb_sessions.get(key)
+    if session is None:
+        session = qb_sessions[key] = QBittorrentSession(
+            base_url, username, password, max_concurrency=QB_MAX_CONCURRENCY
+        )
+    return session
 
-async def qb_get_torrents(sid: str) -> List[Dict]:
+
+async def qb_sync_maindata(qb: QBittorrentSession) -> bool:
     """
-    获取 qBittorrent 中的所有种子
+    通过 sync/maindata 增量同步 qBittorrent 种子状态到本地镜像（qb.torrents）
 
-    Args:
-        sid: qBittorrent 会话 ID
+    首次（rid=0）或服务端要求时返回全量数据，之后只返回变化的字段和已移除的种子。
 
     Returns:
-        List[Dict]: 种子列表
+        bool: 同步成功返回 True
     """
-    if not sid:
-        return []
-
     try:
-        # 使用独立的客户端，避免 cookie 干扰
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{QBITTORRENT_URL.rstrip('/')}/api/v2/torrents/info",
-                cookies={"SID": sid},
-            )
+        response = await qb.request(
+            "GET", "/api/v2/sync/maindata", params={"rid": qb.sync_rid}
+        )
+        if response is None:
+            return False
+        data = response.json()
+    except Exception as e:
+        logger.error(f"同步 qBittorrent 状态失败: {e}")
+        return False
 
-            # 检查认证失败
-            if response.status_code in (401, 403):
-                logger.warning("qBittorrent 会话已过期，清除缓存")
-                qb_clear_session()
-                return []
+    if data.get("full_update"):
+        qb.torrents.clear()
 
-            return response.json()
-    except Exception as e:
-        logger.error(f"获取 qBittorrent 种子列表失败: {e}")
-        return []
+    for torrent_hash, fields in (data.get("torrents") or {}).items():
+        qb.torrents.setdefault(torrent_hash, {"hash": torrent_hash}).update(fields)
+
+    for torrent_hash in data.get("torrents_removed") or []:
+        qb.torrents.pop(torrent_hash, None)
+
+    qb.sync_rid = data.get("rid", qb.sync_rid)
+    qb.synced_at = datetime.now().timestamp()
+    logger.debug(f"qBittorrent 状态同步完成: rid={qb.sync_rid}, 种子数={len(qb.torrents)}")
+    return True
 
 
-async def qb_get_torrent_trackers(torrent_hash: str, sid: str) -> List[Dict]:
+async def qb_get_torrent_trackers(qb: QBittorrentSession, torrent_hash: str) -> Optional[List[Dict]]:
     """
     获取指定种子的 tracker 列表
 
     Args:
+        qb: qBittorrent 会话
         torrent_hash: 种子哈希值
-        sid: qBittorrent 会话 ID
 
     Returns:
-        List[Dict]: Tracker 列表
+        Optional[List[Dict]]: Tracker 列表；请求失败（网络异常、认证失败）时返回 None，
+            与"确实没有 tracker"的空列表区分
     """
-    if not sid:
-        return []
-
     try:
-        # 使用独立的客户端，避免 cookie 干扰
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{QBITTORRENT_URL.rstrip('/')}/api/v2/torrents/trackers",
-                params={"hash": torrent_hash},
-                cookies={"SID": sid},
-            )
-
-            # 检查认证失败
-            if response.status_code in (401, 403):
-                logger.warning("qBittorrent 会话已过期，清除缓存")
-                qb_clear_session()
-                return []
-
-            return response.json()
+        response = await qb.request(
+            "GET", "/api/v2/torrents/trackers", params={"hash": torrent_hash}
+        )
+        if response is None:
+            return None
+        return response.json()
     except Exception as e:
         logger.error(f"获取种子 tracker 失败: {e}")
-        return []
+        return None
 
 
-async def qb_find_torrent_by_mteam_id(mteam_id: str, sid: str) -> Optional[str]:
+def extract_mteam_id(tracker_url: str) -> Optional[str]:
     """
-    通过 M-Team ID 查找 qBittorrent 中的种子
+    从 tracker URL 中解析 M-Team 种子 ID
+
+    支持两种格式：
+        1. 直接包含 torrent_id=xxx
+        2. base64 编码的 credential 参数，解码后包含 tid=xxx
 
     Args:
-        mteam_id: M-Team 种子 ID
-        sid: qBittorrent 会话 ID
+        tracker_url: tracker 地址
 
     Returns:
-        Optional[str]: 找到返回种子哈希值，否则返回 None
+        Optional[str]: 解析成功返回 M-Team ID，否则返回 None
     """
-    torrents = await qb_get_torrents(sid)
+    if not tracker_url or "m-team" not in tracker_url.lower():
+        return None
 
-    for torrent in torrents:
-        torrent_hash = torrent.get("hash")
-        if not torrent_hash:
-            continue
+    # 方式1: 直接匹配 torrent_id=xxx
+    match = re.search(r'torrent_id=(\d+)', tracker_url)
+    if match:
+        return match.group(1)
+
+    # 方式2: 解析 base64 编码的 credential 参数，查找 tid=xxx
+    credential_match = re.search(r'credential=([A-Za-z0-9+/=]+)', tracker_url)
+    if credential_match:
+        try:
+            decoded = base64.b64decode(credential_match.group(1)).decode('utf-8', errors='ignore')
+        except Exception as e:
+            logger.debug(f"解析 credential 失败: {e}")
+            return None
+        tid_match = re.search(r'tid=(\d+)', decoded)
+        if tid_match:
+            return tid_match.group(1)
+
+    return None
+
+
+def qb_index_add(qb: QBittorrentSession, torrent_hash: str, mteam_id: Optional[str]) -> None:
+    """将种子写入索引（mteam_id 为 None 表示已检查过的非 M-Team 种子）"""
+    qb.hash_to_mteam[torrent_hash] = mteam_id
+    if mteam_id:
+        qb.mteam_index[mteam_id] = torrent_hash
 
-        # 获取该种子的 trackers
-        trackers = await qb_get_torrent_trackers(torrent_hash, sid)
 
-        # 检查 tracker URL 中是否包含 M-Team ID
+def qb_index_remove(qb: QBittorrentSession, torrent_hash: str) -> None:
+    """从索引中移除种子"""
+    mteam_id = qb.hash_to_mteam.pop(torrent_hash, None)
+    if mteam_id and qb.mteam_index.get(mteam_id) == torrent_hash:
+        del qb.mteam_index[mteam_id]
+
+
+def qb_index_clear(qb: QBittorrentSession) -> None:
+    """清空索引（例如切换 qBittorrent 实例时）"""
+    qb.index_synced_at = 0.0
+    qb.mteam_index.clear()
+    qb.hash_to_mteam.clear()
+
+
+async def qb_sync_index(account: "Account") -> bool:
+    """
+    增量同步账号所用 qBittorrent 实例的 M-Team ID -> infohash 索引
+
+    基于 sync/maindata 镜像，只对新出现的种子解析 tracker：优先使用镜像中的 tracker 字段，
+    无法解析时才单独请求该种子的 tracker 列表（并发执行）；已从客户端移除的种子会被剔除。
+
+    Returns:
+        bool: 同步成功返回 True
+    """
+    qb = account.qb
+    if not await qb_sync_maindata(qb):
+        # 同步失败时保留现有索引
+        return False
+
+    pending_hashes = []
+    added = 0
+
+    for torrent_hash, torrent in list(qb.torrents.items()):
+        if torrent_hash in qb.hash_to_mteam:
+            # tracker 字段可能在种子开始汇报后才出现，补充解析
+            if qb.hash_to_mteam[torrent_hash] is None:
+                mteam_id = extract_mteam_id(torrent.get("tracker", ""))
+                if mteam_id:
+                    qb_index_add(qb, torrent_hash, mteam_id)
+            continue
+
+        # 快速路径：当前工作的 tracker 已包含 M-Team ID
+        mteam_id = extract_mteam_id(torrent.get("tracker", ""))
+        if mteam_id:
+            qb_index_add(qb, torrent_hash, mteam_id)
+            added += 1
+        else:
+            pending_hashes.append(torrent_hash)
+
+    # 其余新种子并发查询 tracker 列表（并发数由会话限制）
+    tracker_lists = await asyncio.gather(*(qb_get_torrent_trackers(qb, h) for h in pending_hashes))
+    failed = 0
+    for torrent_hash, trackers in zip(pending_hashes, tracker_lists):
+        if trackers is None:
+            # 查询失败不能认定为非 M-Team 种子，保持未索引，下次同步时重试
+            failed += 1
+            continue
+        mteam_id = None
         for tracker in trackers:
-            tracker_url = tracker.get("url", "")
-            if "m-team" not in tracker_url.lower():
-                continue
+            mteam_id = extract_mteam_id(tracker.get("url", ""))
+            if mteam_id:
+                break
+        qb_index_add(qb, torrent_hash, mteam_id)
+        added += 1
+
+    removed_hashes = [h for h in qb.hash_to_mteam if h not in qb.torrents]
+    for torrent_hash in removed_hashes:
+        qb_index_remove(qb, torrent_hash)
+
+    if failed:
+        logger.warning(f"{failed} 个种子的 tracker 列表获取失败，将在下次同步时重试")
+
+    qb.index_synced_at = datetime.now().timestamp()
+    if added or removed_hashes:
+        account.mark_dirty("qb_index")
+        logger.info(f"qBittorrent 索引已更新: 新增 {added}，移除 {len(removed_hashes)}，M-Team 种子 {len(qb.mteam_index)}")
+    return True
 
-            # 方式1: 直接匹配 torrent_id=xxx
-            if f"torrent_id={mteam_id}" in tracker_url:
-                logger.info(f"找到 M-Team 种子 {mteam_id} 对应的 qBittorrent 种子: {torrent.get('name')}")
-                return torrent_hash
 
-            # 方式2: 解析 base64 编码的 credential 参数，查找 tid=xxx
-            try:
-                # 从 URL 中提取 credential 参数
-                if "credential=" in tracker_url:
-                    # 提取 credential 值
-                    credential_match = re.search(r'credential=([A-Za-z0-9+/=]+)', tracker_url)
-                    if credential_match:
-                        credential_b64 = credential_match.group(1)
-                        # Base64 解码
-                        decoded = base64.b64decode(credential_b64).decode('utf-8', errors='ignore')
-                        # 检查 tid=xxx
-                        if f"tid={mteam_id}" in decoded:
-                            logger.info(f"找到 M-Team 种子 {mteam_id} 对应的 qBittorrent 种子 (via credential): {torrent.get('name')}")
-                            return torrent_hash
-            except Exception as e:
-                logger.debug(f"解析 credential 失败: {e}")
-                continue
+def qb_mirror_summary(qb: QBittorrentSession) -> Dict[str, Any]:
+    """qBittorrent 状态镜像的汇总（仪表盘导航栏使用）"""
+    downloading = sum(1 for torrent in qb.torrents.values() if torrent.get("progress", 0) < 1)
+    return {
+        "configured": qb.configured,
+        "total": len(qb.torrents),
+        "downloading": downloading,
+        "seeding": len(qb.torrents) - downloading,
+        "mteam": len(qb.mteam_index),
+        "last_sync": datetime.fromtimestamp(qb.synced_at, BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S") if qb.synced_at else None,
+    }
 
-    return None
 
+async def qb_find_torrent_by_mteam_id(account: "Account", mteam_id: str, sync: bool = True) -> Optional[str]:
+    """
+    通过 M-Team ID 查找账号所用 qBittorrent 中的种子
 
-async def qb_delete_torrent(torrent_hash: str, sid: str, delete_files: bool = False) -> bool:
+    Args:
+        account: 账号
+        mteam_id: M-Team 种子 ID
+        sync: 索引未命中时是否先增量同步再查找
+
+    Returns:
+        Optional[str]: 找到返回种子哈希值，否则返回 None
+    """
+    qb = account.qb
+    start_time = time.monotonic()
+    torrent_hash = qb.mteam_index.get(mteam_id)
+    recently_synced = datetime.now().timestamp() - qb.index_synced_at < QB_INDEX_MIN_SYNC_INTERVAL
+    if torrent_hash is None and sync and not recently_synced:
+        await qb_sync_index(account)
+        torrent_hash = qb.mteam_index.get(mteam_id)
+
+    QB_LOOKUP_SECONDS.observe(time.monotonic() - start_time, "hit" if torrent_hash else "miss")
+    if torrent_hash:
+        logger.info(f"找到 M-Team 种子 {mteam_id} 对应的 qBittorrent 种子: {torrent_hash}")
+    return torrent_hash
+
+
+async def qb_delete_torrents(account: "Account", torrent_hashes: List[str], delete_files: bool = False) -> bool:
     """
-    从 qBittorrent 删除种子
+    从账号所用 qBittorrent 批量删除种子（一次请求，hashes=a|b|c）
 
     Args:
-        torrent_hash: 种子哈希值
-        sid: qBittorrent 会话 ID
+        account: 账号
+        torrent_hashes: 种子哈希值列表
         delete_files: 是否同时删除文件（默认 False，仅删除种子）
 
     Returns:
         bool: 删除成功返回 True，否则返回 False
     """
-    if not sid:
+    if not torrent_hashes:
         return False
 
-    try:
-        # 使用独立的客户端，避免 cookie 干扰
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{QBITTORRENT_URL.rstrip('/')}/api/v2/torrents/delete",
-                data={"hashes": torrent_hash, "deleteFiles": "true" if delete_files else "false"},
-                cookies={"SID": sid},
-            )
+    start_time = time.monotonic()
+    deleted = await _qb_delete_torrents(account, torrent_hashes, delete_files)
+    QB_DELETE_SECONDS.observe(time.monotonic() - start_time, "ok" if deleted else "error")
+    return deleted
 
-            # 检查认证失败
-            if response.status_code in (401, 403):
-                logger.warning("qBittorrent 会话已过期，清除缓存")
-                qb_clear_session()
-                return False
 
-            if response.status_code == 200:
-                logger.info(f"成功从 qBittorrent 删除种子: {torrent_hash}")
-                return True
-            else:
-                logger.error(f"从 qBittorrent 删除种子失败: {response.text}")
-                return False
+async def _qb_delete_torrents(account: "Account", torrent_hashes: List[str], delete_files: bool) -> bool:
+    try:
+        response = await account.qb.request(
+            "POST",
+            "/api/v2/torrents/delete",
+            data={"hashes": "|".join(torrent_hashes), "deleteFiles": "true" if delete_files else "false"},
+        )
+        if response is None:
+            return False
+
+        if response.status_code == 200:
+            logger.info(f"成功从 qBittorrent 删除 {len(torrent_hashes)} 个种子: {', '.join(torrent_hashes)}")
+            for torrent_hash in torrent_hashes:
+                qb_index_remove(account.qb, torrent_hash)
+            account.mark_dirty("qb_index")
+            return True
+        else:
+            logger.error(f"从 qBittorrent 删除种子失败: {response.text}")
+            return False
     except Exception as e:
         logger.error(f"删除 qBittorrent 种子异常: {e}")
         return False
@@ -485,31 +1532,34 @@ def calculate_remaining_time(end_time: Optional[datetime]) -> Dict[str, Any]:
     }
 
 
+DISCOUNT_LABELS: Dict[str, Dict[str, str]] = {
+    "FREE": {"zh": "免费", "en": "Free"},
+    "_2X_FREE": {"zh": "2x免费", "en": "2x Free"},
+    "PERCENT_50": {"zh": "50%", "en": "50%"},
+    "_2X_PERCENT_50": {"zh": "2x50%", "en": "2x50%"},
+    "_2X": {"zh": "2x上传", "en": "2x UP"},
+    "PERCENT_30": {"zh": "30%", "en": "30%"},
+    "PERCENT_70": {"zh": "70%", "en": "70%"},
+    "NORMAL": {"zh": "无优惠", "en": "None"}
+}
+
+
 def get_discount_label(discount: Optional[str]) -> Dict[str, str]:
     """获取优惠标签"""
-    labels = {
-        "FREE": {"zh": "免费", "en": "Free"},
-        "_2X_FREE": {"zh": "2x免费", "en": "2x Free"},
-        "PERCENT_50": {"zh": "50%", "en": "50%"},
-        "_2X_PERCENT_50": {"zh": "2x50%", "en": "2x50%"},
-        "_2X": {"zh": "2x上传", "en": "2x UP"},
-        "PERCENT_30": {"zh": "30%", "en": "30%"},
-        "PERCENT_70": {"zh": "70%", "en": "70%"},
-        "NORMAL": {"zh": "无优惠", "en": "None"}
-    }
-    return labels.get(discount, {"zh": discount or "未知", "en": discount or "Unknown"})
+    label = DISCOUNT_LABELS.get(discount)
+    if label is None:
+        return {"zh": discount or "未知", "en": discount or "Unknown"}
+    return dict(label)
 
 
 # ============ API 请求函数 ============
-async def fetch_categories() -> List[Dict]:
+async def fetch_categories(account: "Account") -> List[Dict]:
     """获取种子类别列表"""
-    if not MT_TOKEN:
+    if not account.token:
         return []
 
     try:
-        client = await get_http_client()
-        response = await client.post(MT_CATEGORY_URL, headers=get_headers())
-        data = response.json()
+        data = await mt_post(account, MT_CATEGORY_URL, priority=MT_PRIORITY_LOW)
         if data.get("code") == "0":
             return data.get("data", [])
     except Exception as e:
@@ -517,169 +1567,313 @@ async def fetch_categories() -> List[Dict]:
     return []
 
 
+async def mt_fetch_page(
+    account: "Account",
+    url: str,
+    payload: Dict[str, Any],
+    page: int,
+    page_size: int = MT_PAGE_SIZE,
+    priority: int = MT_PRIORITY_NORMAL,
+    label: str = ""
+) -> Optional[Dict[str, Any]]:
+    """
+    请求分页接口的单页
+
+    Returns:
+        Optional[Dict]: 成功返回接口的 data 字段（含 data 列表与 totalPages 等分页信息），失败返回 None
+    """
+    try:
+        data = await mt_post(account, url, priority=priority, json={**payload, "pageNumber": page, "pageSize": page_size})
+
+        if data.get("code") == "0":
+            MT_PAGES_FETCHED.inc(mt_endpoint(url))
+            return data.get("data") or {}
+        else:
+            logger.error(f"{label} (page={page}) 失败: {data.get('message')}")
+    except Exception as e:
+        logger.error(f"{label} (page={page}) 异常: {e}")
+
+    return None
+
+
+async def mt_paginate(
+    account: "Account",
+    url: str,
+    payload: Dict[str, Any],
+    page_size: int = MT_PAGE_SIZE,
+    priority: int = MT_PRIORITY_NORMAL,
+    label: str = ""
+) -> AsyncIterator[Any]:
+    """
+    流式遍历分页接口的所有页
+
+    先请求第一页获取总页数，其余页在共享限速器下并发请求，按完成顺序逐页产出
+    (page, total_pages, items)；请求失败的页 items 为 None，由调用方决定如何处理。
+    调用方提前结束遍历时应关闭生成器（await pages.aclose()），尚未完成的页请求会被取消，
+    不再占用账号的限速预算。
+    """
+    first_page = await mt_fetch_page(account, url, payload, 1, page_size, priority, label)
+    if first_page is None:
+        yield 1, 1, None
+        return
+
+    items = list(first_page.get("data") or [])
+    total_pages = _safe_int(first_page.get("totalPages"))
+    if not total_pages:
+        # 未返回总页数时根据总数推算
+        total_pages = -(-_safe_int(first_page.get("total")) // page_size) or 1
+    if total_pages > MT_MAX_PAGES:
+        logger.warning(f"{label} 共 {total_pages} 页，超过上限，只获取前 {MT_MAX_PAGES} 页")
+        total_pages = MT_MAX_PAGES
+
+    yield 1, total_pages, items
+
+    if total_pages <= 1 or len(items) < page_size:
+        return
+
+    async def fetch(page: int) -> Any:
+        return page, await mt_fetch_page(account, url, payload, page, page_size, priority, label)
+
+    tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, total_pages + 1)]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            page, result = await next_page
+            yield page, total_pages, (list(result.get("data") or []) if result is not None else None)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _item_torrent_id(item: Any) -> str:
+    """从列表项中提取种子 ID（兼容 {torrent: {id}}、{id} 与纯 ID）"""
+    if isinstance(item, dict):
+        return str(item.get("torrent", {}).get("id", item.get("id", "")))
+    return str(item)
+
+
+async def crawl_free_torrents(
+    account: "Account",
+    discount_type: str,
+    mode: str,
+    page_size: int = MT_PAGE_SIZE
+) -> Tuple[List[Dict], Dict[str, Any], bool]:
+    """用账号的限速预算完整抓取一个搜索组合（自动翻页直到最后一页），返回 (items, stats, 是否完整)"""
+    start_time = asyncio.get_event_loop().time()
+    items = []
+    pages_fetched = 0
+    total_pages = 0
+
+    payload = {"mode": mode, "discount": discount_type}
+    async for _, total_pages, page_items in mt_paginate(
+        account, MT_SEARCH_URL, payload, page_size, label=f"搜索 {discount_type} (mode={mode})"
+    ):
+        if page_items is not None:
+            pages_fetched += 1
+            items.extend(page_items)
+
+    elapsed = asyncio.get_event_loop().time() - start_time
+    SEARCH_SECONDS.observe(elapsed, discount_type, mode)
+    stats = {
+        "pages": pages_fetched,
+        "total_pages": total_pages,
+        "count": len(items),
+        "elapsed": round(elapsed, 3),
+        "crawled_by": account.name,
+    }
+    logger.info(
+        f"[{account.name}] 搜索 {discount_type} (mode={mode}) 完成: "
+        f"{pages_fetched}/{total_pages} 页, {len(items)} 个种子, 耗时 {elapsed:.2f}秒"
+    )
+
+    return items, stats, pages_fetched > 0 and pages_fetched >= total_pages
+
+
+def search_cache_max_age() -> float:
+    """
+    共享搜索结果的有效期（秒）：最短刷新间隔的一半
+
+    同一轮内各账号的刷新都能复用同一次抓取，而任何账号的定时刷新看到的搜索结果
+    都不会早于它上一次刷新，单账号时每次定时刷新仍然重新抓取。
+    """
+    return max(60, min(account.refresh_interval for account in accounts.values()) / 2)
+
+
 async def search_free_torrents(
+    account: "Account",
     discount_type: str = "FREE",
     mode: str = "normal",
-    page: int = 1,
-    page_size: int = 200
+    page_size: int = MT_PAGE_SIZE,
+    max_age: Optional[float] = None
 ) -> List[Dict]:
-    """搜索免费种子"""
-    if not MT_TOKEN:
+    """
+    搜索免费种子（所有账号共享同一份结果）
+
+    结果不超过 max_age 秒（默认 search_cache_max_age()）时直接复用，否则由本账号抓取；
+    用户状态、收藏等账号相关信息由 process_torrent 在之后叠加。
+    """
+    if not account.token:
         return []
 
-    payload = {
-        "mode": mode,
-        "discount": discount_type,
-        "pageNumber": page,
-        "pageSize": page_size
-    }
+    items, stats = await search_cache.get(
+        (discount_type, mode),
+        search_cache_max_age() if max_age is None else max_age,
+        lambda: crawl_free_torrents(account, discount_type, mode, page_size),
+    )
+    account.search_stats[f"{discount_type}/{mode}"] = stats
+    return items
+
+
+async def fetch_user_torrent_list(
+    account: "Account",
+    torrent_type: str,
+    priority: int = MT_PRIORITY_NORMAL
+) -> Optional[Dict[str, Dict]]:
+    """
+    分页获取用户种子列表，逐页构建 {torrent_id: item} 映射
+
+    Args:
+        account: 账号
+        torrent_type: SEEDING 或 LEECHING
+        priority: 请求优先级
 
+    Returns:
+        Optional[Dict]: 全部页获取成功返回映射，任一页失败返回 None（调用方保留旧数据）
+    """
+    torrents: Dict[str, Dict] = {}
+    payload = {"userid": int(account.user_id), "type": torrent_type}
+
+    pages = mt_paginate(account, MT_USER_TORRENT_URL, payload, priority=priority, label=f"获取 {torrent_type} 种子")
     try:
-        client = await get_http_client()
-        response = await client.post(MT_SEARCH_URL, headers=get_headers(), json=payload)
-        data = response.json()
+        async for _, _, page_items in pages:
+            if page_items is None:
+                # 结果作废，关闭生成器以取消其余页的请求
+                return None
+            for item in page_items:
+                torrents[_item_torrent_id(item)] = item
+    finally:
+        await pages.aclose()
 
-        if data.get("code") == "0":
-            return data.get("data", {}).get("data", [])
-        else:
-            logger.error(f"搜索 {discount_type} (mode={mode}) 失败: {data.get('message')}")
-    except Exception as e:
-        logger.error(f"搜索 {discount_type} (mode={mode}) 异常: {e}")
+    return torrents
 
-    return []
 
+async def fetch_user_leeching(account: "Account") -> bool:
+    """
+    获取下载中的种子（快速路径：不等待做种列表，供紧急检查使用）
+
+    Returns:
+        bool: 获取成功返回 True；失败时保留上次数据并返回 False
+    """
+    if not account.token or not account.user_id:
+        return False
+
+    try:
+        leeching = await fetch_user_torrent_list(account, "LEECHING", priority=MT_PRIORITY_EMERGENCY)
+        if leeching is not None:
+            account.user_torrent_status["leeching"] = leeching
+            account.expiry_scheduler.rearm(leeching)
+            logger.info(f"获取到 {len(leeching)} 个下载中种子")
+            return True
+        logger.warning("获取下载中种子失败，保留上次数据")
+    except Exception as e:
+        logger.error(f"获取下载中种子失败: {e}")
+    return False
 
-async def fetch_user_torrent_status() -> None:
-    """获取用户的做种和下载中的种子状态"""
-    global user_torrent_status
 
-    if not MT_TOKEN or not MT_USER_ID:
+async def fetch_user_seeding(account: "Account") -> None:
+    """获取做种中的种子（可能有数千个，分页并发获取）"""
+    if not account.token or not account.user_id:
         return
 
     try:
-        userid = int(MT_USER_ID)
-        client = await get_http_client()
-
-        # 获取做种中的种子
-        seeding_payload = {"userid": userid, "type": "SEEDING", "pageNumber": 1, "pageSize": 200}
-        seeding_response = await client.post(MT_USER_TORRENT_URL, headers=get_headers(), json=seeding_payload)
-        seeding_data = seeding_response.json()
-
-        if seeding_data.get("code") == "0":
-            seeding_list = seeding_data.get("data", {}).get("data", [])
-            user_torrent_status["seeding"] = {
-                str(item.get("torrent", {}).get("id", item.get("id", ""))): item
-                for item in seeding_list
-            }
-            logger.info(f"获取到 {len(user_torrent_status['seeding'])} 个做种中种子")
-
-        # 增加延迟避免 API 速率限制
-        await asyncio.sleep(max(API_DELAY, 2))
-
-        # 获取下载中的种子
-        leeching_payload = {"userid": userid, "type": "LEECHING", "pageNumber": 1, "pageSize": 200}
-        leeching_response = await client.post(MT_USER_TORRENT_URL, headers=get_headers(), json=leeching_payload)
-        leeching_data = leeching_response.json()
-        logger.debug(f"LEECHING API 响应: code={leeching_data.get('code')}, data keys={list(leeching_data.get('data', {}).keys()) if isinstance(leeching_data.get('data'), dict) else type(leeching_data.get('data'))}")
-
-        if leeching_data.get("code") == "0":
-            leeching_list = leeching_data.get("data", {}).get("data", [])
-            user_torrent_status["leeching"] = {
-                str(item.get("torrent", {}).get("id", item.get("id", ""))): item
-                for item in leeching_list
-            }
-            logger.info(f"获取到 {len(user_torrent_status['leeching'])} 个下载中种子")
+        seeding = await fetch_user_torrent_list(account, "SEEDING")
+        if seeding is not None:
+            account.user_torrent_status["seeding"] = seeding
+            logger.info(f"获取到 {len(seeding)} 个做种中种子")
         else:
-            logger.warning(f"获取下载中种子失败: code={leeching_data.get('code')}, message={leeching_data.get('message')}")
-
+            logger.warning("获取做种中种子失败，保留上次数据")
     except Exception as e:
-        logger.error(f"获取用户种子状态失败: {e}")
-
+        logger.error(f"获取做种中种子失败: {e}")
 
-async def fetch_user_collection() -> None:
-    """获取用户收藏列表"""
-    global user_collection_ids
 
-    if not MT_TOKEN:
+async def fetch_user_collection(account: "Account") -> None:
+    """获取用户收藏列表（分页获取全部）"""
+    if not account.token:
         return
 
     try:
-        client = await get_http_client()
-        payload = {"pageNumber": 1, "pageSize": 200}
-        response = await client.post(MT_COLLECTION_LIST_URL, headers=get_headers(), json=payload)
-        data = response.json()
-
-        if data.get("code") == "0":
-            collection_list = data.get("data", {}).get("data", [])
-            user_collection_ids = set()
-            for item in collection_list:
-                if isinstance(item, dict):
-                    torrent_id = str(item.get("torrent", {}).get("id", item.get("id", "")))
-                else:
-                    torrent_id = str(item)
-                if torrent_id:
-                    user_collection_ids.add(torrent_id)
-            logger.info(f"获取到 {len(user_collection_ids)} 个收藏种子")
+        collection_ids = set()
+        pages = mt_paginate(account, MT_COLLECTION_LIST_URL, {}, label="获取收藏列表")
+        try:
+            async for _, _, page_items in pages:
+                if page_items is None:
+                    logger.warning("获取收藏列表失败，保留上次数据")
+                    return
+                for item in page_items:
+                    torrent_id = _item_torrent_id(item)
+                    if torrent_id:
+                        collection_ids.add(torrent_id)
+        finally:
+            await pages.aclose()
+
+        account.user_collection_ids = collection_ids
+        logger.info(f"获取到 {len(collection_ids)} 个收藏种子")
 
     except Exception as e:
         logger.error(f"获取收藏列表失败: {e}")
 
 
-async def fetch_user_profile() -> None:
+async def fetch_user_profile(account: "Account") -> None:
     """获取用户资料（分享率、上传、下载）"""
-    global user_profile
-
-    if not MT_TOKEN:
+    if not account.token:
         return
 
-    if not MT_USER_ID:
-        logger.warning("未配置 MT_USER_ID，无法获取用户资料")
+    if not account.user_id:
+        logger.warning(f"[{account.name}] 未配置用户ID，无法获取用户资料")
         return
 
     try:
-        profile_data = await _fetch_profile_by_uid(MT_USER_ID)
+        profile_data = await _fetch_profile_by_uid(account, account.user_id)
         if profile_data:
-            user_profile = profile_data
+            account.user_profile = profile_data
             logger.debug(f"获取用户资料: 分享率={profile_data['share_ratio']:.2f}")
 
     except Exception as e:
         logger.error(f"获取用户资料失败: {e}")
 
 
-async def fetch_rival_profile() -> None:
+async def fetch_rival_profile(account: "Account") -> None:
     """获取对手用户资料（分享率）"""
-    global rival_profile
-
-    if not MT_TOKEN:
+    if not account.token:
         return
 
-    if not RIVAL_USER_ID:
-        logger.info("未配置 RIVAL_USER_ID，跳过获取对手资料")
+    if not account.rival_user_id:
+        logger.info(f"[{account.name}] 未配置对手用户ID，跳过获取对手资料")
         return
 
     try:
-        profile_data = await _fetch_profile_by_uid(RIVAL_USER_ID)
+        profile_data = await _fetch_profile_by_uid(account, account.rival_user_id, priority=MT_PRIORITY_LOW)
         if profile_data:
-            rival_profile = profile_data
+            account.rival_profile = profile_data
             logger.debug(f"获取对手资料: 分享率={profile_data['share_ratio']:.2f}")
 
     except Exception as e:
         logger.error(f"获取对手资料失败: {e}")
 
 
-async def _fetch_profile_by_uid(uid: str) -> Optional[Dict[str, Any]]:
-    """通用函数：根据用户ID获取资料"""
+async def _fetch_profile_by_uid(
+    account: "Account",
+    uid: str,
+    priority: int = MT_PRIORITY_NORMAL
+) -> Optional[Dict[str, Any]]:
+    """通用函数：用账号的令牌根据用户ID获取资料"""
     try:
-        client = await get_http_client()
-
         headers = {
             "User-Agent": USER_AGENT,
-            "x-api-key": MT_TOKEN.strip(),
+            "x-api-key": account.token,
             "Accept": "application/json",
         }
         form_data = {"uid": str(uid)}
-        response = await client.post(MT_PROFILE_URL, headers=headers, data=form_data)
-        data = response.json()
+        data = await mt_post(account, MT_PROFILE_URL, priority=priority, headers=headers, data=form_data)
 
         logger.debug(f"Profile API 响应 (uid={uid}): code={data.get('code')}")
 
@@ -745,25 +1939,29 @@ def _safe_int(value: Any) -> int:
 
 
 # ============ PushPlus 推送功能 ============
-async def send_pushplus_alert(title: str, content: str) -> bool:
+async def send_pushplus_alert(account: "Account", title: str, content: str) -> bool:
     """
-    发送 PushPlus 微信推送通知
+    用账号的 PushPlus Token 发送微信推送通知（多账号时标题前加账号名）
 
     Args:
+        account: 账号
         title: 通知标题
         content: 通知内容（支持HTML格式）
 
     Returns:
         bool: 是否发送成功
     """
-    if not PUSHPLUS_TOKEN:
+    if not account.pushplus_token:
         logger.warning("未配置 PUSHPLUS_TOKEN，跳过推送")
         return False
 
+    if len(accounts) > 1:
+        title = f"[{account.name}] {title}"
+
     try:
         client = await get_http_client()
         payload = {
-            "token": PUSHPLUS_TOKEN,
+            "token": account.pushplus_token,
             "title": title,
             "content": content,
             "template": "html"
@@ -789,33 +1987,24 @@ async def send_pushplus_alert(title: str, content: str) -> bool:
         return False
 
 
-def can_send_alert(torrent_id: str, alert_type: str) -> bool:
+def can_send_alert(account: "Account", torrent_id: str, alert_type: str) -> bool:
     """
     检查是否可以发送报警（防止重复报警）
 
     Args:
+        account: 账号
         torrent_id: 种子ID
-        alert_type: 报警类型 ('expiring' 或 'changed')
+        alert_type: 报警类型 ('expiring' 或 'changed')，冷却时间见 ALERT_COOLDOWNS
 
     Returns:
         bool: 是否可以发送
     """
-    global sent_alerts
-
-    alert_key = f"{torrent_id}_{alert_type}"
-    now = datetime.now().timestamp()
-
-    # 清理过期的报警记录
-    expired_keys = [k for k, v in sent_alerts.items() if now - v > ALERT_COOLDOWN]
-    for k in expired_keys:
-        del sent_alerts[k]
-
-    # 检查是否在冷却期内
-    if alert_key in sent_alerts:
+    if not account.sent_alerts.try_acquire(torrent_id, alert_type):
+        ALERTS.inc(account.name, alert_type, "suppressed")
         return False
 
-    # 记录本次报警
-    sent_alerts[alert_key] = now
+    ALERTS.inc(account.name, alert_type, "triggered")
+    account.mark_dirty("alert_cooldowns")
     return True
 
 
@@ -826,36 +2015,103 @@ def is_free_discount(discount: Optional[str]) -> bool:
     return "FREE" in discount.upper()
 
 
-async def check_emergency_alerts(torrents: List[Dict]) -> None:
+def build_deletion_message(account: "Account", deleted: bool, login_success: bool, torrent_found: bool) -> str:
+    """生成简化的删除状态消息"""
+    if deleted:
+        return "🗑️ <span style='color:green;'><b>已触发自动删除，安全下车。</b></span>"
+    elif not account.auto_delete_enabled:
+        return "⚠️ <span style='color:orange;'>自动删除未开启，建议立即手动检查！</span>"
+    elif not login_success:
+        return "🚫 <span style='color:red;'>客户端登录失败，无法执行删除。</span>"
+    elif not torrent_found:
+        return "❓ <span style='color:gray;'>未在客户端找到该种子。</span>"
+    else:
+        return "⚠️ <span style='color:red;'><b>自动删除失败，请务必手动处理！</b></span>"
+
+
+async def auto_delete_torrents(account: "Account", torrent_ids: List[str]) -> Dict[str, Any]:
+    """
+    批量从账号所用 qBittorrent 删除指定的 M-Team 种子
+
+    登录一次、同步一次索引，然后用一次 torrents/delete 请求删除所有命中的种子。
+
+    Args:
+        account: 账号
+        torrent_ids: M-Team 种子 ID 列表
+
+    Returns:
+        Dict: {"login_success": bool, "found": {mteam_id: hash}, "deleted": bool}
+    """
+    result = {"login_success": False, "found": {}, "deleted": False}
+
+    if not torrent_ids or not account.auto_delete_enabled or not account.qb.base_url:
+        return result
+
+    if not await account.qb.login():
+        logger.warning(f"[{account.name}] qBittorrent 登录失败，无法执行自动删除")
+        return result
+    result["login_success"] = True
+
+    await qb_sync_index(account)
+    for torrent_id in torrent_ids:
+        torrent_hash = await qb_find_torrent_by_mteam_id(account, torrent_id, sync=False)
+        if torrent_hash:
+            result["found"][torrent_id] = torrent_hash
+        else:
+            logger.info(f"未在 qBittorrent 中找到种子 {torrent_id}，无需删除")
+
+    if result["found"]:
+        result["deleted"] = await qb_delete_torrents(account, list(result["found"].values()), delete_files=True)
+        if result["deleted"]:
+            logger.info(f"成功自动删除 {len(result['found'])} 个种子: {', '.join(result['found'])}")
+        else:
+            logger.warning(f"自动删除种子失败: {', '.join(result['found'])}")
+
+    return result
+
+
+def remember_free_torrent(account: "Account", torrent_id: str, discount_end_time: Optional[str]) -> None:
+    """记录免费种子，保留期从免费结束时间起算（永久免费则从现在起算）"""
+    end_time = parse_datetime(discount_end_time)
+    expires_at = None
+    if end_time:
+        expires_at = end_time.replace(tzinfo=BEIJING_TZ).timestamp() + KNOWN_FREE_TTL
+    account.known_free_torrent_ids.add(torrent_id, expires_at)
+
+
+async def check_emergency_alerts(account: "Account", torrents: List["TorrentRecord"]) -> None:
+    """检查紧急情况（耗时记录到 emergency_check_duration_seconds），详见 _check_emergency_alerts"""
+    async with EMERGENCY_CHECK_SECONDS.time():
+        await _check_emergency_alerts(account, torrents)
+
+
+async def _check_emergency_alerts(account: "Account", torrents: List["TorrentRecord"]) -> None:
     """
     检查紧急情况并执行自动删除/发送报警
 
     情况 A：免费即将到期且未下载完（剩余时间 < 10 分钟）
     情况 B：免费突然失效且未下载完（变节检测）
 
+    先收集本轮所有需要处理的种子，再一次性批量删除，最后并发发送报警。
+
     注意：自动删除功能独立于 PushPlus，即使未配置 PUSHPLUS_TOKEN 也会执行删除
     """
-    global known_free_torrent_ids
+    # 第一步：更新历史免费记录
+    for torrent in torrents:
+        if is_free_discount(torrent.discount):
+            remember_free_torrent(account, torrent.id, torrent.discount_end_time)
+    account.mark_dirty("known_free_torrent_ids")
 
-    # 如果既没有启用自动删除，也没有配置推送，则跳过
-    if not auto_delete_enabled and not PUSHPLUS_TOKEN:
-        # 仍然需要更新历史免费记录（用于变节检测）
-        for torrent in torrents:
-            if is_free_discount(torrent.get("discount")):
-                known_free_torrent_ids.add(torrent["id"])
+    # 如果既没有启用自动删除，也没有配置推送，也没有页面订阅事件，则跳过
+    if not account.auto_delete_enabled and not account.pushplus_token and not len(account.event_broker):
         return
 
-    alerts_to_send = []
-
-    # 第一步：更新历史免费记录
-    for torrent in torrents:
-        if is_free_discount(torrent.get("discount")):
-            known_free_torrent_ids.add(torrent["id"])
+    logger.debug(f"当前追踪的免费种子数量: {len(account.known_free_torrent_ids)}")
 
-    logger.debug(f"当前追踪的免费种子数量: {len(known_free_torrent_ids)}")
+    emergencies = []
 
-    # 第二步：检查下载中的种子是否有紧急情况
-    for torrent_id, leeching_info in user_torrent_status.get("leeching", {}).items():
+    # 第二步：收集下载中种子的紧急情况
+    for torrent_id, leeching_info in account.user_torrent_status.get("leeching", {}).items():
         # 获取下载进度
         try:
             peer_info = leeching_info.get("peer", {})
@@ -881,6 +2137,17 @@ async def check_emergency_alerts(torrents: List[Dict]) -> None:
             logger.debug(f"解析种子 {torrent_id} 信息失败: {e}")
             continue
 
+        # 下载中的免费种子同样计入历史免费记录（巡检任务不依赖搜索结果）
+        if is_free_discount(current_discount):
+            remember_free_torrent(account, torrent_id, discount_end_time_str)
+
+        emergency = {
+            "id": torrent_id,
+            "name": torrent_name,
+            "progress": progress,
+            "discount": current_discount,
+        }
+
         # 情况 A：免费即将到期且未下载完（剩余时间 < 10 分钟时自动删除）
         if is_free_discount(current_discount) and discount_end_time_str:
             discount_end_time = parse_datetime(discount_end_time_str)
@@ -889,133 +2156,108 @@ async def check_emergency_alerts(torrents: List[Dict]) -> None:
                 remaining_minutes = remaining["hours"] * 60
 
                 if remaining_minutes < ALERT_THRESHOLD_MINUTES and remaining_minutes > 0:
-                    if can_send_alert(torrent_id, "expiring"):
-                        # 初始化状态变量
-                        deleted_successfully = False
-                        torrent_found = False
-                        login_success = False
-
-                        # 如果启用自动删除功能，尝试从 qBittorrent 删除该种子
-                        if auto_delete_enabled and QBITTORRENT_URL:
-                            logger.info(f"自动删除功能已启用（免费即将到期），尝试删除种子 {torrent_id} ({torrent_name[:50]}...)")
-                            sid = await qb_login()
-                            if sid:
-                                login_success = True
-                                torrent_hash = await qb_find_torrent_by_mteam_id(torrent_id, sid)
-                                if torrent_hash:
-                                    torrent_found = True
-                                    deleted_successfully = await qb_delete_torrent(torrent_hash, sid, delete_files=True)
-                                    if deleted_successfully:
-                                        logger.info(f"成功自动删除种子 {torrent_id}（免费即将到期）")
-                                    else:
-                                        logger.warning(f"自动删除种子 {torrent_id} 失败（免费即将到期）")
-                                else:
-                                    logger.info(f"未在 qBittorrent 中找到种子 {torrent_id}，无需删除")
-                            else:
-                                logger.warning("qBittorrent 登录失败，无法执行自动删除")
-
-                        # 生成简化的删除状态消息
-                        if deleted_successfully:
-                            deletion_message = "🗑️ <span style='color:green;'><b>已触发自动删除，安全下车。</b></span>"
-                        elif not auto_delete_enabled:
-                            deletion_message = "⚠️ <span style='color:orange;'>自动删除未开启，建议立即手动检查！</span>"
-                        elif not login_success:
-                            deletion_message = "🚫 <span style='color:red;'>客户端登录失败，无法执行删除。</span>"
-                        elif not torrent_found:
-                            deletion_message = "❓ <span style='color:gray;'>未在客户端找到该种子。</span>"
-                        else:
-                            deletion_message = "⚠️ <span style='color:red;'><b>自动删除失败，请务必手动处理！</b></span>"
-
-                        # 简化的告警模板
-                        alerts_to_send.append({
-                            "type": "expiring",
-                            "title": "MT免费即将结束",
-                            "content": (
-                                f"<h3>⚠️ 免费即将结束 ({remaining['display']})</h3>"
-                                f"<p><b>{torrent_name}</b></p>"
-                                f"📉 进度: <b style='color:orange;'>{progress:.1f}%</b><br>"
-                                f"⏱️ 剩余: <b style='color:red;'>{remaining['display']}</b><br>"
-                                f"🏷️ 优惠: {current_discount}<br>"
-                                f"<hr>"
-                                f"{deletion_message}"
-                            )
-                        })
+                    if can_send_alert(account, torrent_id, "expiring"):
+                        emergencies.append({**emergency, "type": "expiring", "remaining": remaining})
 
         # 情况 B：免费突然失效（变节检测）
-        if not is_free_discount(current_discount) and torrent_id in known_free_torrent_ids:
-            if can_send_alert(torrent_id, "changed"):
-                # 初始化状态变量
-                deleted_successfully = False
-                torrent_found = False
-                login_success = False
-
-                # 如果启用自动删除功能，尝试从 qBittorrent 删除该种子
-                if auto_delete_enabled and QBITTORRENT_URL:
-                    logger.info(f"自动删除功能已启用（免费变收费），尝试删除种子 {torrent_id} ({torrent_name[:50]}...)")
-                    sid = await qb_login()
-                    if sid:
-                        login_success = True
-                        torrent_hash = await qb_find_torrent_by_mteam_id(torrent_id, sid)
-                        if torrent_hash:
-                            torrent_found = True
-                            deleted_successfully = await qb_delete_torrent(torrent_hash, sid, delete_files=True)
-                            if deleted_successfully:
-                                logger.info(f"成功自动删除种子 {torrent_id}（免费变收费）")
-                            else:
-                                logger.warning(f"自动删除种子 {torrent_id} 失败（免费变收费）")
-                        else:
-                            logger.info(f"未在 qBittorrent 中找到种子 {torrent_id}，无需删除")
-                    else:
-                        logger.warning("qBittorrent 登录失败，无法执行自动删除")
-
-                # 生成简化的删除状态消息
-                if deleted_successfully:
-                    deletion_message = "🗑️ <span style='color:green;'><b>已触发自动删除，安全下车。</b></span>"
-                elif not auto_delete_enabled:
-                    deletion_message = "⚠️ <span style='color:orange;'>自动删除未开启，建议立即手动检查！</span>"
-                elif not login_success:
-                    deletion_message = "🚫 <span style='color:red;'>客户端登录失败，无法执行删除。</span>"
-                elif not torrent_found:
-                    deletion_message = "❓ <span style='color:gray;'>未在客户端找到该种子。</span>"
-                else:
-                    deletion_message = "⚠️ <span style='color:red;'><b>自动删除失败，请务必手动处理！</b></span>"
-
-                # 简化的告警模板
-                alerts_to_send.append({
-                    "type": "changed",
-                    "title": "MT免费优惠已失效",
-                    "content": (
-                        f"<h3>🚨 免费优惠已失效</h3>"
-                        f"<p><b>{torrent_name}</b></p>"
-                        f"📉 进度: <b style='color:orange;'>{progress:.1f}%</b><br>"
-                        f"❌ 状态: <b style='color:red;'>{current_discount or 'NORMAL'}</b><br>"
-                        f"<hr>"
-                        f"{deletion_message}"
-                    )
-                })
-
-    # 发送报警（仅当配置了 PUSHPLUS_TOKEN）
-    if PUSHPLUS_TOKEN:
-        for alert in alerts_to_send:
-            await send_pushplus_alert(alert["title"], alert["content"])
-            await asyncio.sleep(1)  # 避免推送太快
-
-
-async def toggle_collection(torrent_id: str, make: bool) -> Dict[str, Any]:
+        if not is_free_discount(current_discount) and torrent_id in account.known_free_torrent_ids:
+            if can_send_alert(account, torrent_id, "changed"):
+                emergencies.append({**emergency, "type": "changed"})
+
+    account.mark_dirty("known_free_torrent_ids")
+
+    if not emergencies:
+        return
+
+    # 第三步：批量删除（一次登录、一次索引同步、一次删除请求）
+    auto_delete = account.auto_delete_enabled and account.qb.base_url
+    if auto_delete:
+        logger.info(
+            f"[{account.name}] 自动删除功能已启用，尝试删除 {len(emergencies)} 个紧急种子: "
+            f"{', '.join(e['id'] for e in emergencies)}"
+        )
+    deletion = await auto_delete_torrents(account, [e["id"] for e in emergencies])
+    if auto_delete:
+        account.event_broker.publish("auto_delete", {
+            "ids": [e["id"] for e in emergencies],
+            "login_success": deletion["login_success"],
+            "found": list(deletion["found"]),
+            "deleted": deletion["deleted"],
+        })
+
+    # 第四步：生成报警
+    alerts_to_send = []
+    for emergency in emergencies:
+        torrent_found = emergency["id"] in deletion["found"]
+        deletion_message = build_deletion_message(
+            account, torrent_found and deletion["deleted"], deletion["login_success"], torrent_found
+        )
+
+        # 简化的告警模板
+        if emergency["type"] == "expiring":
+            remaining = emergency["remaining"]
+            alerts_to_send.append({
+                "type": "expiring",
+                "title": "MT免费即将结束",
+                "content": (
+                    f"<h3>⚠️ 免费即将结束 ({remaining['display']})</h3>"
+                    f"<p><b>{emergency['name']}</b></p>"
+                    f"📉 进度: <b style='color:orange;'>{emergency['progress']:.1f}%</b><br>"
+                    f"⏱️ 剩余: <b style='color:red;'>{remaining['display']}</b><br>"
+                    f"🏷️ 优惠: {emergency['discount']}<br>"
+                    f"<hr>"
+                    f"{deletion_message}"
+                )
+            })
+        else:
+            alerts_to_send.append({
+                "type": "changed",
+                "title": "MT免费优惠已失效",
+                "content": (
+                    f"<h3>🚨 免费优惠已失效</h3>"
+                    f"<p><b>{emergency['name']}</b></p>"
+                    f"📉 进度: <b style='color:orange;'>{emergency['progress']:.1f}%</b><br>"
+                    f"❌ 状态: <b style='color:red;'>{emergency['discount'] or 'NORMAL'}</b><br>"
+                    f"<hr>"
+                    f"{deletion_message}"
+                )
+            })
+
+    for emergency in emergencies:
+        account.event_broker.publish("alert", {
+            "type": emergency["type"],
+            "id": emergency["id"],
+            "name": emergency["name"],
+            "progress": round(emergency["progress"], 1),
+            "discount": emergency["discount"],
+            "remaining": emergency["remaining"]["display"] if emergency["type"] == "expiring" else None,
+            "deleted": emergency["id"] in deletion["found"] and deletion["deleted"],
+        })
+
+    # 第五步：并发发送报警（仅当配置了 PUSHPLUS_TOKEN）
+    if account.pushplus_token:
+        results = await asyncio.gather(*(
+            send_pushplus_alert(account, a["title"], a["content"]) for a in alerts_to_send
+        ))
+        for alert, sent in zip(alerts_to_send, results):
+            ALERTS.inc(account.name, alert["type"], "sent" if sent else "failed")
+
+
+async def toggle_collection(account: "Account", torrent_id: str, make: bool) -> Dict[str, Any]:
     """切换种子收藏状态"""
-    if not MT_TOKEN:
+    if not account.token:
         return {"success": False, "message": "未配置 MT_TOKEN"}
 
     try:
-        client = await get_http_client()
         headers = {
             "User-Agent": USER_AGENT,
-            "x-api-key": MT_TOKEN.strip(),
+            "x-api-key": account.token,
             "Accept": "application/json",
         }
         form_data = {"id": torrent_id, "make": "true" if make else "false"}
-        response = await client.post(MT_COLLECTION_URL, headers=headers, data=form_data)
-        data = response.json()
+        data = await mt_post(
+            account, MT_COLLECTION_URL, priority=MT_PRIORITY_INTERACTIVE, headers=headers, data=form_data
+        )
 
         if data.get("code") == "0":
             action = "收藏" if make else "取消收藏"
@@ -1030,24 +2272,132 @@ async def toggle_collection(torrent_id: str, make: bool) -> Dict[str, Any]:
 
 
 # ============ 数据处理 ============
-def process_torrent(item: Dict, discount_type: str, torrent_mode: str = "normal") -> Dict:
-    """处理单个种子数据"""
-    torrent_info = item if "id" in item else item.get("torrent", item)
-    status_info = torrent_info.get("status", {})
+class TorrentRecord:
+    """
+    种子记录（紧凑结构）
 
-    torrent_id = str(torrent_info.get("id", ""))
-    name = torrent_info.get("name", "未知")
-    small_descr = torrent_info.get("smallDescr", "")
-    size = int(torrent_info.get("size", 0))
+    只保存原始字段；size_display、discount_label、remaining、detail_url 等派生字段按需计算，
+    在 API 边界通过 to_dict() 转换为字典。模板可直接通过属性访问。
+    """
+
+    __slots__ = (
+        "id", "name", "small_descr", "size", "seeders", "leechers",
+        "discount", "discount_end_time", "end_time", "category", "category_name",
+        "created_date", "user_status", "user_progress", "is_collected", "mode",
+        "_remaining_cache",
+    )
+
+    # API 可输出的字段（to_dict 的全部键）
+    API_FIELDS = (
+        "id", "name", "small_descr", "size", "size_display", "seeders", "leechers",
+        "discount", "discount_label", "discount_end_time", "remaining", "category",
+        "category_name", "created_date", "detail_url", "user_status", "user_progress",
+        "is_collected", "mode",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        small_descr: str,
+        size: int,
+        seeders: int,
+        leechers: int,
+        discount: Optional[str],
+        discount_end_time: Optional[str],
+        category: Any,
+        category_name: str,
+        created_date: str,
+        user_status: str,
+        user_progress: float,
+        is_collected: bool,
+        mode: str,
+    ):
+        self.id = id
+        self.name = name
+        self.small_descr = small_descr
+        self.size = size
+        self.seeders = seeders
+        self.leechers = leechers
+        # 取值有限的字段驻留，数万条记录共享同一个字符串对象
+        self.discount = sys.intern(discount) if discount else discount
+        self.discount_end_time = discount_end_time
+        self.end_time = parse_datetime(discount_end_time)
+        self.category = sys.intern(str(category)) if category is not None else ""
+        self.category_name = sys.intern(category_name) if category_name else ""
+        self.created_date = created_date
+        self.user_status = sys.intern(user_status)
+        self.user_progress = user_progress
+        self.is_collected = is_collected
+        self.mode = sys.intern(mode)
+        self._remaining_cache: Optional[Any] = None
+
+    @property
+    def size_display(self) -> str:
+        return format_size(self.size)
+
+    @property
+    def discount_label(self) -> Dict[str, str]:
+        return get_discount_label(self.discount)
+
+    @property
+    def detail_url(self) -> str:
+        return f"{MT_SITE_URL}/detail/{self.id}"
+
+    @property
+    def remaining(self) -> Dict[str, Any]:
+        """剩余时间（按分钟缓存，同一分钟内多次访问只计算一次）"""
+        minute = int(datetime.now().timestamp() // 60)
+        if self._remaining_cache is None or self._remaining_cache[0] != minute:
+            self._remaining_cache = (minute, calculate_remaining_time(self.end_time))
+        return self._remaining_cache[1]
+
+    @property
+    def remaining_hours(self) -> float:
+        return self.remaining["hours"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 API 返回的字典"""
+        return self.project(self.API_FIELDS)
+
+    def project(self, fields: Sequence[str]) -> Dict[str, Any]:
+        """只输出指定字段（字段名需先经 API_FIELDS 校验）"""
+        result = {name: getattr(self, name) for name in fields}
+        remaining = result.get("remaining")
+        if remaining is not None and remaining["hours"] == float("inf"):
+            # 永久免费：JSON 不支持 Infinity，输出 null
+            result["remaining"] = {**remaining, "hours": None}
+        return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TorrentRecord":
+        """从 to_dict() 的结果恢复（用于持久化快照）"""
+        return cls(
+            id=data.get("id", ""),
+            name=data.get("name", ""),
+            small_descr=data.get("small_descr", ""),
+            size=_safe_int(data.get("size")),
+            seeders=_safe_int(data.get("seeders")),
+            leechers=_safe_int(data.get("leechers")),
+            discount=data.get("discount"),
+            discount_end_time=data.get("discount_end_time"),
+            category=data.get("category", ""),
+            category_name=data.get("category_name", ""),
+            created_date=data.get("created_date", ""),
+            user_status=data.get("user_status", "none"),
+            user_progress=data.get("user_progress", 0),
+            is_collected=bool(data.get("is_collected")),
+            mode=data.get("mode", "normal"),
+        )
 
-    seeders = int(status_info.get("seeders", 0))
-    leechers = int(status_info.get("leechers", 0))
 
-    discount = status_info.get("discount", discount_type)
-    discount_end_time = parse_datetime(status_info.get("discountEndTime"))
-    remaining = calculate_remaining_time(discount_end_time)
+def process_torrent(account: "Account", item: Dict, discount_type: str, torrent_mode: str = "normal") -> TorrentRecord:
+    """处理单个种子数据（叠加该账号的做种/下载/收藏状态）"""
+    torrent_info = item if "id" in item else item.get("torrent", item)
+    status_info = torrent_info.get("status", {})
 
-    detail_url = f"{MT_SITE_URL}/detail/{torrent_id}"
+    torrent_id = str(torrent_info.get("id", ""))
+    user_torrent_status = account.user_torrent_status
 
     # 用户状态
     user_status = "none"
@@ -1068,79 +2418,297 @@ def process_torrent(item: Dict, discount_type: str, torrent_mode: str = "normal"
         except (ValueError, TypeError, KeyError):
             user_progress = 0
 
-    return {
-        "id": torrent_id,
-        "name": name,
-        "small_descr": small_descr,
-        "size": size,
-        "size_display": format_size(size),
-        "seeders": seeders,
-        "leechers": leechers,
-        "discount": discount,
-        "discount_label": get_discount_label(discount),
-        "discount_end_time": status_info.get("discountEndTime"),
-        "remaining": remaining,
-        "category": torrent_info.get("category", ""),
-        "category_name": torrent_info.get("categoryName", ""),
-        "created_date": torrent_info.get("createdDate", ""),
-        "detail_url": detail_url,
-        "user_status": user_status,
-        "user_progress": user_progress,
-        "is_collected": torrent_id in user_collection_ids,
-        "mode": torrent_mode
+    return TorrentRecord(
+        id=torrent_id,
+        name=torrent_info.get("name", "未知"),
+        small_descr=torrent_info.get("smallDescr", ""),
+        size=int(torrent_info.get("size", 0)),
+        seeders=int(status_info.get("seeders", 0)),
+        leechers=int(status_info.get("leechers", 0)),
+        discount=status_info.get("discount", discount_type),
+        discount_end_time=status_info.get("discountEndTime"),
+        category=torrent_info.get("category", ""),
+        category_name=torrent_info.get("categoryName", ""),
+        created_date=torrent_info.get("createdDate", ""),
+        user_status=user_status,
+        user_progress=user_progress,
+        is_collected=torrent_id in account.user_collection_ids,
+        mode=torrent_mode,
+    )
+
+
+class TorrentIndex:
+    """
+    种子快照的列式索引
+
+    每次刷新后构建一次：数值列（大小、做种数、免费结束时间、发布时间）各保存一份按值排序的行号，
+    范围筛选用二分查找；优惠类型、频道、类别、用户状态保存倒排行号集合，等值筛选取交集。
+    行号即快照中的位置（快照按剩余时间升序）。
+    """
+
+    SORT_KEYS = ("remaining", "size", "seeders", "created")
+
+    def __init__(self, torrents: List["TorrentRecord"]):
+        self.torrents = torrents
+        count = len(torrents)
+
+        self.by_discount: Dict[str, set] = {}
+        self.by_mode: Dict[str, set] = {}
+        self.by_category: Dict[str, set] = {}
+        self.by_user_status: Dict[str, set] = {}
+        for row, torrent in enumerate(torrents):
+            self.by_discount.setdefault(torrent.discount, set()).add(row)
+            self.by_mode.setdefault(torrent.mode, set()).add(row)
+            self.by_category.setdefault(torrent.category, set()).add(row)
+            self.by_user_status.setdefault(torrent.user_status, set()).add(row)
+
+        # 数值列：(按值排序的行号, 对应的有序值)
+        end_ts = [
+            t.end_time.replace(tzinfo=BEIJING_TZ).timestamp() if t.end_time else float("inf")
+            for t in torrents
+        ]
+        self.columns: Dict[str, List[Any]] = {
+            "size": [t.size for t in torrents],
+            "seeders": [t.seeders for t in torrents],
+            "remaining": end_ts,
+            "created": [t.created_date or "" for t in torrents],
+        }
+        self.sorted: Dict[str, Any] = {}
+        for name, values in self.columns.items():
+            order = sorted(range(count), key=values.__getitem__)
+            self.sorted[name] = (order, [values[row] for row in order])
+
+    def _range(self, column: str, low: Any = None, high: Any = None) -> set:
+        """数值列范围筛选（闭区间），返回行号集合"""
+        order, values = self.sorted[column]
+        start = bisect.bisect_left(values, low) if low is not None else 0
+        end = bisect.bisect_right(values, high) if high is not None else len(values)
+        return set(order[start:end])
+
+    def query(
+        self,
+        discount: Optional[str] = None,
+        mode: Optional[str] = None,
+        category: Optional[str] = None,
+        user_status: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        min_seeders: Optional[int] = None,
+        max_seeders: Optional[int] = None,
+        min_remaining: Optional[float] = None,
+        max_remaining: Optional[float] = None,
+        sort: str = "remaining",
+        descending: bool = False,
+    ) -> List["TorrentRecord"]:
+        """按条件筛选并排序，返回种子记录列表"""
+        candidates: List[set] = []
+        for postings, value in (
+            (self.by_discount, discount),
+            (self.by_mode, mode),
+            (self.by_category, category),
+            (self.by_user_status, user_status),
+        ):
+            if value:
+                candidates.append(postings.get(value, set()))
+
+        if min_size is not None or max_size is not None:
+            candidates.append(self._range("size", min_size, max_size))
+        if min_seeders is not None or max_seeders is not None:
+            candidates.append(self._range("seeders", min_seeders, max_seeders))
+        if min_remaining is not None or max_remaining is not None:
+            now = datetime.now().timestamp()
+            candidates.append(self._range(
+                "remaining",
+                now + min_remaining * 3600 if min_remaining is not None else None,
+                now + max_remaining * 3600 if max_remaining is not None else None,
+            ))
+
+        if candidates:
+            candidates.sort(key=len)
+            rows = candidates[0].intersection(*candidates[1:])
+        else:
+            rows = None  # 无筛选条件
+
+        return [self.torrents[row] for row in self._sorted_rows(rows, sort, descending)]
+
+    def _sorted_rows(self, rows: Optional[set], sort: str, descending: bool) -> List[int]:
+        """对行号排序：结果较少时直接排序，较多时按预排序顺序过滤"""
+        if sort not in self.SORT_KEYS:
+            sort = "remaining"
+        order, _ = self.sorted[sort]
+
+        if rows is None:
+            result = list(order)
+        elif len(rows) * max(1, len(rows).bit_length()) < len(order):
+            values = self.columns[sort]
+            result = sorted(rows, key=values.__getitem__)
+        else:
+            result = [row for row in order if row in rows]
+
+        if descending:
+            result.reverse()
+        return result
+
+
+# 免费种子搜索组合（普通区和成人区）
+SEARCH_COMBINATIONS = [
+    ("FREE", "normal"),
+    ("_2X_FREE", "normal"),
+    ("FREE", "adult"),
+    ("_2X_FREE", "adult"),
+]
+
+
+def bump_snapshot_version(account: "Account") -> None:
+    """账号的 cached_data 变化后调用：递增版本号并丢弃该账号旧版本的缓存响应"""
+    account.snapshot_version += 1
+    response_cache.clear(account.name)
+
+
+def rebuild_torrent_index(account: "Account", torrents: List[TorrentRecord]) -> None:
+    """为账号新的种子快照构建列式索引"""
+    account.torrent_index = TorrentIndex(torrents)
+
+
+def build_snapshot_event(
+    account: "Account",
+    previous: List[TorrentRecord],
+    current: List[TorrentRecord]
+) -> Dict[str, Any]:
+    """
+    对比前后两次快照，生成推送给页面的增量事件
+
+    added/changed 为完整记录（同 /api/torrents），removed 为 ID 列表；
+    changed 只包含优惠类型、用户状态、进度、收藏或做种人数发生变化的种子。
+    """
+    event = {
+        "version": account.snapshot_version,
+        "last_update": account.cached_data.get("last_update"),
+        "error": account.cached_data.get("error"),
+        "warming": is_warming(account),
+        "total": len(current),
     }
 
+    previous_by_id = {t.id: t for t in previous}
+    added, changed = [], []
+    for torrent in current:
+        old = previous_by_id.pop(torrent.id, None)
+        if old is None:
+            added.append(torrent)
+        elif (
+            old.discount != torrent.discount
+            or old.discount_end_time != torrent.discount_end_time
+            or old.user_status != torrent.user_status
+            or round(old.user_progress) != round(torrent.user_progress)
+            or old.is_collected != torrent.is_collected
+            or old.seeders != torrent.seeders
+            or old.leechers != torrent.leechers
+        ):
+            changed.append(torrent)
+    removed = list(previous_by_id)
+
+    if len(added) + len(changed) + len(removed) > STREAM_MAX_DIFF:
+        event["reset"] = True
+        return event
+
+    event["added"] = [t.to_dict() for t in added]
+    event["changed"] = [t.to_dict() for t in changed]
+    event["removed"] = removed
+    return event
+
+
+async def timed_stage(account: "Account", name: str, coro: Any) -> Any:
+    """执行刷新流水线的一个阶段并记录耗时（秒）到账号的 refresh_stage_stats 和 refresh_stage_duration_seconds"""
+    start_time = asyncio.get_event_loop().time()
+    try:
+        return await coro
+    finally:
+        elapsed = asyncio.get_event_loop().time() - start_time
+        account.refresh_stage_stats[name] = round(elapsed, 3)
+        REFRESH_STAGE_SECONDS.observe(elapsed, name)
+
+
+async def search_all_free_torrents(account: "Account", max_age: Optional[float] = None) -> List[Any]:
+    """各组合并发搜索（优先复用其他账号本轮的抓取），返回 [(discount_type, mode, items), ...]"""
+    results = await asyncio.gather(*(
+        search_free_torrents(account, discount_type, mode=mode, max_age=max_age)
+        for discount_type, mode in SEARCH_COMBINATIONS
+    ))
+    return [(discount_type, mode, items) for (discount_type, mode), items in zip(SEARCH_COMBINATIONS, results)]
 
-async def fetch_all_free_torrents() -> Dict[str, Any]:
-    """获取所有免费种子"""
-    global cached_data
 
-    if not MT_TOKEN:
-        cached_data["error"] = "未配置 MT_TOKEN 环境变量"
-        return cached_data
+async def warm_qb_index(account: "Account") -> None:
+    """
+    增量同步 qBittorrent 状态镜像和索引
+
+    只要配置了 qBittorrent 就同步（不论是否启用自动删除），镜像同时供仪表盘展示，
+    紧急删除时也可直接命中索引。
+    """
+    if account.qb.configured:
+        if await account.qb.login():
+            await qb_sync_index(account)
 
-    logger.info("开始搜索免费种子")
 
-    # 获取用户状态
-    await fetch_user_torrent_status()
-    await asyncio.sleep(API_DELAY)
-    await fetch_user_collection()
-    await asyncio.sleep(API_DELAY)
-    await fetch_user_profile()
-    await asyncio.sleep(API_DELAY)
-    await fetch_rival_profile()
+async def fetch_all_free_torrents(account: "Account", force_search: bool = False) -> Dict[str, Any]:
+    """
+    获取账号的所有免费种子
 
+    刷新流水线按依赖关系执行：用户状态、收藏、资料、对手资料、搜索、类别、
+    qBittorrent 索引互不依赖，在账号的限速器下并发执行；process_torrent 只等待
+    搜索、用户状态和收藏三个输入；紧急检查在处理完成后执行。
+    搜索结果由所有账号共享（见 SearchCache），force_search 为 True 时不复用已缓存的结果。
+    """
+    if not account.token:
+        account.cached_data["error"] = "未配置 MT_TOKEN 环境变量"
+        account.last_refresh_completed_at = datetime.now().timestamp()
+        bump_snapshot_version(account)
+        return account.cached_data
+
+    logger.info(f"[{account.name}] 开始搜索免费种子")
+    account.refresh_stage_stats.clear()
+
+    # 互不依赖的阶段并发启动（请求间隔与优先级由账号的调度器统一控制）
+    def stage(name: str, coro: Any) -> asyncio.Task:
+        return asyncio.create_task(timed_stage(account, name, coro))
+
+    leeching_task = stage("leeching", fetch_user_leeching(account))
+    seeding_task = stage("seeding", fetch_user_seeding(account))
+    collection_task = stage("collection", fetch_user_collection(account))
+    search_task = stage("search", search_all_free_torrents(account, max_age=0 if force_search else None))
+    profile_task = stage("profile", fetch_user_profile(account))
+    rival_task = stage("rival", fetch_rival_profile(account))
+    categories_task = stage("categories", fetch_categories(account))
+    qb_index_task = stage("qb_index", warm_qb_index(account))
+
+    # process_torrent 依赖搜索结果、用户状态和收藏
+    search_results, _, _, _ = await asyncio.gather(search_task, leeching_task, seeding_task, collection_task)
+
+    process_start = asyncio.get_event_loop().time()
     all_torrents = []
     seen_ids = set()
 
-    # 并行搜索普通区和成人区
-    search_tasks = [
-        ("FREE", "normal"),
-        ("_2X_FREE", "normal"),
-        ("FREE", "adult"),
-        ("_2X_FREE", "adult"),
-    ]
-
-    for discount_type, mode in search_tasks:
-        await asyncio.sleep(API_DELAY)
-        torrents = await search_free_torrents(discount_type, mode=mode)
+    # 结果按组合顺序合并去重
+    for discount_type, mode, torrents in search_results:
         for item in torrents:
-            torrent = process_torrent(item, discount_type, mode)
-            if torrent["id"] not in seen_ids:
-                seen_ids.add(torrent["id"])
+            torrent = process_torrent(account, item, discount_type, mode)
+            if torrent.id not in seen_ids:
+                seen_ids.add(torrent.id)
                 all_torrents.append(torrent)
 
     # 按剩余时间排序
-    all_torrents.sort(key=lambda t: t["remaining"]["hours"])
+    all_torrents.sort(key=lambda t: t.remaining_hours)
+    account.refresh_stage_stats["process"] = round(asyncio.get_event_loop().time() - process_start, 3)
 
     # 获取类别列表
-    categories = await fetch_categories()
+    categories = await categories_task
 
     # 统计
-    free_count = sum(1 for t in all_torrents if t["discount"] == "FREE")
-    free_2x_count = sum(1 for t in all_torrents if t["discount"] == "_2X_FREE")
+    free_count = sum(1 for t in all_torrents if t.discount == "FREE")
+    free_2x_count = sum(1 for t in all_torrents if t.discount == "_2X_FREE")
 
-    cached_data = {
+    rebuild_torrent_index(account, all_torrents)
+    previous_torrents = account.cached_data.get("torrents", [])
+    account.cached_data = {
         "torrents": all_torrents,
         "categories": categories,
         "last_update": datetime.now(BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S"),
@@ -1150,45 +2718,280 @@ async def fetch_all_free_torrents() -> Dict[str, Any]:
         "free_2x_count": free_2x_count
     }
 
-    logger.info(f"找到 {len(all_torrents)} 个免费种子 (Free: {free_count}, 2xFree: {free_2x_count})")
+    logger.info(
+        f"[{account.name}] 找到 {len(all_torrents)} 个免费种子 (Free: {free_count}, 2xFree: {free_2x_count})"
+    )
+    account.mark_dirty("cached_data")
+    account.last_refresh_completed_at = datetime.now().timestamp()
+    bump_snapshot_version(account)
 
     # 检查紧急情况（免费即将到期/免费变收费）并执行自动删除
     # 注意：即使未配置 PUSHPLUS_TOKEN，自动删除功能也会正常工作
-    await check_emergency_alerts(all_torrents)
+    await qb_index_task
+    await timed_stage(account, "emergency", check_emergency_alerts(account, all_torrents))
+
+    # 资料类阶段不阻塞种子列表，最后等待完成
+    await asyncio.gather(profile_task, rival_task)
+
+    logger.info(f"[{account.name}] 刷新阶段耗时: " + ", ".join(
+        f"{name}={elapsed:.2f}s" for name, elapsed in account.refresh_stage_stats.items()
+    ))
+
+    account.event_broker.publish(
+        "snapshot", build_snapshot_event(account, previous_torrents, all_torrents), account.snapshot_version
+    )
 
-    return cached_data
+    return account.cached_data
 
 
-async def background_refresh():
-    """后台定时刷新任务"""
+async def background_refresh(account: "Account"):
+    """
+    账号的后台定时刷新任务（按账号自己的刷新间隔）
+
+    单轮刷新抛出的异常只记录日志，不会结束任务；首次刷新失败时结束预热状态并在 error 中给出原因，
+    避免一直显示预热页面。
+    """
     while True:
         start_time = asyncio.get_event_loop().time()
-        await fetch_all_free_torrents()
+        try:
+            await fetch_all_free_torrents(account)
+        except Exception as e:
+            logger.exception(f"[{account.name}] 数据刷新失败")
+            account.cached_data["error"] = f"刷新失败: {e}"
+            if account.last_refresh_completed_at is None:
+                account.last_refresh_completed_at = datetime.now().timestamp()
+            bump_snapshot_version(account)
         elapsed = asyncio.get_event_loop().time() - start_time
-        sleep_time = max(60, REFRESH_INTERVAL - elapsed)  # 至少等待60秒
-        logger.info(f"数据刷新完成，耗时 {elapsed:.1f}秒，下次刷新在 {sleep_time:.0f}秒后")
+        REFRESH_SECONDS.observe(elapsed, account.name)
+        sleep_time = max(60, account.refresh_interval - elapsed)  # 至少等待60秒
+        logger.info(f"[{account.name}] 本轮刷新结束，耗时 {elapsed:.1f}秒，下次刷新在 {sleep_time:.0f}秒后")
         await asyncio.sleep(sleep_time)
 
 
+class ExpiryScheduler:
+    """
+    免费到期定时器
+
+    为每个下载中的免费种子在 (免费结束时间 - ALERT_THRESHOLD_MINUTES) 安排一次唤醒（最小堆），
+    到点后立即拉取下载中列表并执行紧急检查，与刷新间隔无关。
+    下载中数据更新时调用 rearm() 重新安排，过时的堆条目在弹出时惰性丢弃。
+    """
+
+    def __init__(self):
+        self._heap: List[Any] = []  # (唤醒时间戳, torrent_id, 结束时间戳)
+        self._deadlines: Dict[str, float] = {}  # {torrent_id: 免费结束时间戳}
+        self._changed: Optional[asyncio.Event] = None  # 在事件循环内延迟创建
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+
+    def rearm(self, leeching: Dict[str, Dict]) -> None:
+        """根据最新的下载中种子重新安排唤醒时间"""
+        deadlines = {}
+        for torrent_id, leeching_info in leeching.items():
+            status_info = (leeching_info.get("torrent") or {}).get("status") or {}
+            if not is_free_discount(status_info.get("discount")):
+                continue
+            end_time = parse_datetime(status_info.get("discountEndTime"))
+            if end_time is None:
+                continue
+            deadlines[torrent_id] = end_time.replace(tzinfo=BEIJING_TZ).timestamp()
+
+        for torrent_id, end_ts in deadlines.items():
+            if self._deadlines.get(torrent_id) != end_ts:
+                # 剩余时间按分钟取整，晚 1 秒唤醒确保已进入报警阈值
+                fire_at = end_ts - ALERT_THRESHOLD_MINUTES * 60 + 1
+                heapq.heappush(self._heap, (fire_at, torrent_id, end_ts))
+
+        self._deadlines = deadlines
+        self._notify()
+
+    def _pop_due(self, now: float) -> List[str]:
+        """弹出所有已到期的有效条目，返回对应的种子 ID"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, torrent_id, end_ts = heapq.heappop(self._heap)
+            if self._deadlines.get(torrent_id) == end_ts and end_ts > now:
+                due.append(torrent_id)
+        return due
+
+    def _forget(self, torrent_ids: List[str]) -> None:
+        """清除已弹出条目的记录，下次 rearm() 时会重新安排"""
+        for torrent_id in torrent_ids:
+            self._deadlines.pop(torrent_id, None)
+
+    def next_wakeup(self) -> Optional[float]:
+        """下一个有效的唤醒时间戳"""
+        while self._heap:
+            _, torrent_id, end_ts = self._heap[0]
+            if self._deadlines.get(torrent_id) == end_ts:
+                return self._heap[0][0]
+            heapq.heappop(self._heap)
+        return None
+
+    async def run(self, account: "Account") -> None:
+        """定时器主循环（到点后处理 account 的下载中种子）"""
+        self._changed = asyncio.Event()
+        while True:
+            next_wakeup = self.next_wakeup()
+            timeout = None if next_wakeup is None else max(0.0, next_wakeup - datetime.now().timestamp())
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+                continue  # 数据变化，重新计算下一次唤醒
+            except asyncio.TimeoutError:
+                pass
+
+            now = datetime.now().timestamp()
+            if not account.auto_delete_enabled and not account.pushplus_token:
+                # 无需处理：移出堆但不标记为已处理，启用后下次 rearm() 会重新安排
+                self._forget(self._pop_due(now))
+                continue
+
+            due = self._pop_due(now)
+            if not due:
+                continue
+            logger.info(f"[{account.name}] 免费到期定时器触发: {', '.join(due)}")
+            try:
+                # 到点时先刷新下载进度，避免删除刚完成的种子
+                if not await fetch_user_leeching(account):
+                    self._forget(due)
+                    continue
+                await check_emergency_alerts(account, [])
+            except Exception as e:
+                logger.error(f"[{account.name}] 免费到期定时处理失败: {e}")
+                self._forget(due)
+
+
+async def leeching_watchdog(account: "Account"):
+    """
+    下载中种子快速巡检任务
+
+    只拉取 LEECHING 列表并执行到期/变节检查，与完整刷新共享账号的 M-Team 限速预算，
+    但按自己的 WATCHDOG_INTERVAL 节奏运行，避免报警窗口落在两次完整刷新之间。
+    """
+    while True:
+        await asyncio.sleep(WATCHDOG_INTERVAL)
+        if not account.auto_delete_enabled and not account.pushplus_token:
+            continue
+        try:
+            await fetch_user_leeching(account)
+            await check_emergency_alerts(account, [])
+        except Exception as e:
+            logger.error(f"[{account.name}] 下载中种子巡检失败: {e}")
+
+
+# ============ 账号 ============
+def _account_from_config(index: int, config: Dict[str, Any]) -> Account:
+    """由 ACCOUNTS_FILE 中的一项构建账号，未填写的调优项和 qBittorrent 配置沿用环境变量"""
+    name = str(config.get("name") or "")
+    if not ACCOUNT_NAME_PATTERN.match(name):
+        raise ValueError(f"账号 #{index + 1} 的 name 无效（1-32 位字母、数字、- 或 _）: {name!r}")
+    if not config.get("token"):
+        raise ValueError(f"账号 {name} 未配置 token")
+
+    qb_config = config.get("qbittorrent") or {}
+    api_delay = config.get("api_delay", API_DELAY)
+    return Account(
+        name=name,
+        token=str(config["token"]),
+        user_id=str(config.get("user_id") or ""),
+        rival_user_id=str(config.get("rival_user_id") or ""),
+        qb=get_qb_session(
+            qb_config.get("url", QBITTORRENT_URL),
+            qb_config.get("user", QBITTORRENT_USER),
+            qb_config.get("password", QBITTORRENT_PASSWORD),
+        ),
+        refresh_interval=safe_int(config.get("refresh_interval", REFRESH_INTERVAL), REFRESH_INTERVAL, min_val=60, max_val=86400),
+        api_delay=max(0.5, min(float(api_delay or API_DELAY), 10)),
+        api_burst=safe_int(config.get("api_burst", API_BURST), API_BURST, min_val=1, max_val=20),
+        pushplus_token=str(config.get("pushplus_token", PUSHPLUS_TOKEN) or ""),
+    )
+
+
+def load_accounts() -> Dict[str, Account]:
+    """
+    加载账号配置
+
+    未设置 ACCOUNTS_FILE 时由 MT_TOKEN、MT_USER_ID、RIVAL_USER_ID 和 QBITTORRENT_* 组成名为 default 的单个账号；
+    否则读取 JSON 数组，每项形如
+    {"name": "main", "token": "...", "user_id": "123", "rival_user_id": "", "refresh_interval": 600,
+     "api_delay": 1, "api_burst": 3, "pushplus_token": "...", "qbittorrent": {"url": "...", "user": "...", "password": "..."}}，
+    第一项为默认账号（未指定 account 参数的接口使用它）。配置有误时启动失败。
+    """
+    if not ACCOUNTS_FILE:
+        return {"default": Account(
+            name="default",
+            token=MT_TOKEN,
+            user_id=MT_USER_ID,
+            rival_user_id=RIVAL_USER_ID,
+            qb=get_qb_session(QBITTORRENT_URL, QBITTORRENT_USER, QBITTORRENT_PASSWORD),
+        )}
+
+    with open(ACCOUNTS_FILE, encoding="utf-8") as f:
+        configs = json.load(f)
+    if not isinstance(configs, list) or not configs:
+        raise ValueError(f"{ACCOUNTS_FILE} 应为非空 JSON 数组")
+
+    loaded: Dict[str, Account] = {}
+    for index, config in enumerate(configs):
+        account = _account_from_config(index, config)
+        if account.name in loaded:
+            raise ValueError(f"账号名重复: {account.name}")
+        loaded[account.name] = account
+    logger.info(f"已从 {ACCOUNTS_FILE} 加载 {len(loaded)} 个账号: {', '.join(loaded)}")
+    return loaded
+
+
+# 按配置顺序排列，第一个为默认账号
+accounts: Dict[str, Account] = load_accounts()
+
+
+def get_account(name: Optional[str] = None) -> Account:
+    """按名称获取账号，name 为空时返回默认账号；不存在时抛出 KeyError"""
+    if not name:
+        return next(iter(accounts.values()))
+    return accounts[name]
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     global http_client
     http_client = httpx.AsyncClient(timeout=30.0)
 
-    await fetch_all_free_torrents()
-    task = asyncio.create_task(background_refresh())
+    # 立即开始服务：先提供上次保存的快照，首次抓取在后台进行
+    restore_state()
+    tasks = []
+    watched = []
+    for account in accounts.values():
+        tasks.append(asyncio.create_task(background_refresh(account)))
+        if account.user_id and account.token:
+            tasks.append(asyncio.create_task(account.expiry_scheduler.run(account)))
+        # 巡检只拉取该用户的 LEECHING 列表，未配置 user_id 的账号无事可做
+        if WATCHDOG_INTERVAL and account.user_id and account.token:
+            tasks.append(asyncio.create_task(leeching_watchdog(account)))
+            watched.append(account.name)
+    if state_store.enabled:
+        tasks.append(asyncio.create_task(state_store.run()))
+    if watched:
+        logger.info(f"下载中种子巡检已启动，间隔 {WATCHDOG_INTERVAL}秒，账号: {', '.join(watched)}")
 
     yield
 
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        pass
+    for task in tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
     if http_client:
         await http_client.aclose()
+    for qb in qb_sessions.values():
+        await qb.aclose()
+    await state_store.close()
 
 
 # ============ FastAPI 应用 ============
@@ -1229,28 +3032,76 @@ async def add_security_headers(request: Request, call_next):
 
 
 # ============ Rate Limiting (Simple In-Memory) ============
-rate_limit_store: Dict[str, List[float]] = {}
+# Sliding-window counter per client: {ip: (window_start, previous_count, current_count)}
+# Kept in LRU order; idle clients and the least recently seen beyond the cap are evicted.
+rate_limit_store: "OrderedDict[str, Any]" = OrderedDict()
 RATE_LIMIT_REQUESTS = 30  # requests
 RATE_LIMIT_WINDOW = 60  # seconds
+RATE_LIMIT_MAX_CLIENTS = 10000  # tracked client IPs
 
 
 def check_rate_limit(client_ip: str) -> bool:
     """Check if client has exceeded rate limit. Returns True if allowed."""
     now = datetime.now().timestamp()
-    if client_ip not in rate_limit_store:
-        rate_limit_store[client_ip] = []
+    window_start = now - now % RATE_LIMIT_WINDOW
+
+    start, previous, current = rate_limit_store.pop(client_ip, (window_start, 0, 0))
+    if start != window_start:
+        # Roll the window; anything older than one full window no longer counts
+        previous = current if window_start - start == RATE_LIMIT_WINDOW else 0
+        current = 0
+
+    # Weighted estimate of requests in the last RATE_LIMIT_WINDOW seconds
+    weight = 1 - (now - window_start) / RATE_LIMIT_WINDOW
+    allowed = previous * weight + current < RATE_LIMIT_REQUESTS
+    if allowed:
+        current += 1
+    else:
+        HTTP_RATE_LIMITED.inc()
 
-    # Remove old entries
-    rate_limit_store[client_ip] = [
-        ts for ts in rate_limit_store[client_ip]
-        if now - ts < RATE_LIMIT_WINDOW
-    ]
+    rate_limit_store[client_ip] = (window_start, previous, current)
+    prune_rate_limit_store(now)
+    return allowed
 
-    if len(rate_limit_store[client_ip]) >= RATE_LIMIT_REQUESTS:
-        return False
 
-    rate_limit_store[client_ip].append(now)
-    return True
+def prune_rate_limit_store(now: float) -> None:
+    """Evict idle clients (oldest first) and enforce RATE_LIMIT_MAX_CLIENTS."""
+    while rate_limit_store:
+        ip, (start, _, _) = next(iter(rate_limit_store.items()))
+        if len(rate_limit_store) > RATE_LIMIT_MAX_CLIENTS or now - start >= 2 * RATE_LIMIT_WINDOW:
+            del rate_limit_store[ip]
+        else:
+            break
+
+
+def get_memory_stats(account: "Account") -> Dict[str, Any]:
+    """Sizes of long-lived in-memory structures (per-account ones for the given account) and process RSS."""
+    rss_bytes = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss_bytes = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return {
+        "rss_bytes": rss_bytes,
+        "known_free_torrents": len(account.known_free_torrent_ids),
+        "known_free_torrents_max": KNOWN_FREE_MAX,
+        "rate_limit_clients": len(rate_limit_store),
+        "rate_limit_clients_max": RATE_LIMIT_MAX_CLIENTS,
+        "sent_alerts": len(account.sent_alerts),
+        "cached_torrents": len(account.cached_data.get("torrents", [])),
+        "user_seeding": len(account.user_torrent_status.get("seeding", {})),
+        "user_leeching": len(account.user_torrent_status.get("leeching", {})),
+        "user_collection": len(account.user_collection_ids),
+        "qb_torrents": len(account.qb.torrents),
+        "qb_index": len(account.qb.hash_to_mteam),
+        "response_cache": len(response_cache),
+        "response_cache_max": RESPONSE_CACHE_MAX_ENTRIES,
+        "search_cache": len(search_cache),
+        "stream_subscribers": len(account.event_broker),
+        "stream_subscribers_max": STREAM_MAX_SUBSCRIBERS,
+    }
 
 # 静态文件（如果存在）
 try:
@@ -1259,78 +3110,229 @@ except Exception:
     pass
 
 
+def is_warming(account: "Account") -> bool:
+    """账号的首次刷新是否仍在进行"""
+    return account.last_refresh_completed_at is None
+
+
+def is_ready(account: "Account") -> bool:
+    """账号是否可以提供有意义的数据（首次刷新已完成，或已恢复上次保存的快照）"""
+    return not is_warming(account) or bool(account.cached_data.get("last_update"))
+
+
+def resolve_account(name: Optional[str]) -> "Account":
+    """解析请求中的 account 参数，未指定时为默认账号，未知账号返回 404"""
+    try:
+        return get_account(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"未知账号: {name}")
+
+
+def encode_json(data: Any) -> bytes:
+    """与 FastAPI 默认 JSONResponse 相同的编码方式"""
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def cached_response(
+    request: Request,
+    account: "Account",
+    key: Any,
+    build: Callable[[], bytes],
+    media_type: str = "application/json"
+) -> Response:
+    """
+    返回缓存的序列化响应
+
+    缓存键包含账号名、该账号的快照版本、当前分钟（剩余时间按分钟变化）和预热状态；
+    客户端接受 gzip 时直接返回预压缩内容；gzip 变体使用带 -gz 后缀的独立强 ETag，
+    If-None-Match 只与实际返回的变体比较，命中时返回 304。
+    """
+    minute = int(datetime.now().timestamp() // 60)
+    body, gzip_body, etag = response_cache.get_or_build(
+        (account.name, account.snapshot_version, minute, is_warming(account), key), build
+    )
+    use_gzip = gzip_body is not None and "gzip" in request.headers.get("accept-encoding", "")
+    if use_gzip:
+        etag = etag[:-1] + '-gz"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gzip_body, media_type=media_type, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
 @app.get("/", response_class=HTMLResponse)
-async def dashboard(request: Request):
-    """主仪表盘页面"""
-    return templates.TemplateResponse(
-        "index.html",
-        {
+async def dashboard(request: Request, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """
+    主仪表盘页面（渲染结果按账号和快照版本缓存）
+
+    外壳模式下页面不含任何快照数据，内容不随刷新变化，ETag 保持不变；
+    两种模式下页面都通过 /api/torrents 和 /api/profile 增量更新，不再整页重新加载。
+    """
+    current = resolve_account(account)
+
+    def render() -> bytes:
+        if DASHBOARD_SHELL:
+            empty_profile = {"share_ratio": 0, "uploaded_display": "-", "downloaded_display": "-"}
+            data, warming, profile, rival = {"torrents": []}, False, empty_profile, empty_profile
+            version = None
+        else:
+            data, warming = current.cached_data, is_warming(current)
+            profile, rival = current.user_profile, current.rival_profile
+            version = current.snapshot_version
+        return templates.get_template("index.html").render({
             "request": request,
-            "data": cached_data,
-            "refresh_interval": REFRESH_INTERVAL,
+            "data": data,
+            "warming": warming,
+            "shell": DASHBOARD_SHELL,
+            "snapshot_version": version,
+            "warming_reload_seconds": WARMING_RELOAD_SECONDS,
+            "refresh_interval": current.refresh_interval,
             "site_url": MT_SITE_URL,
-            "user_profile": user_profile,
-            "rival_profile": rival_profile
-        }
-    )
+            "user_profile": profile,
+            "rival_profile": rival,
+            "account": current.name,
+            "account_names": list(accounts),
+            "qbittorrent_configured": current.qb.configured,
+        }).encode("utf-8")
+
+    return cached_response(request, current, ("/",), render, media_type="text/html; charset=utf-8")
+
+
+def query_torrents(
+    account: "Account",
+    limit: Optional[int],
+    offset: int,
+    projection: Optional[List[str]],
+    include_categories: bool,
+    **filters: Any
+) -> Dict[str, Any]:
+    """按筛选条件查询账号的当前快照并组装 /api/torrents 的响应"""
+    if account.torrent_index is None:
+        rebuild_torrent_index(account, account.cached_data.get("torrents", []))
+
+    torrents = account.torrent_index.query(**filters)
+
+    filtered_count = len(torrents)
+    page = torrents[offset:offset + limit] if limit is not None else torrents[offset:]
+    next_offset = offset + len(page)
+
+    result = {
+        **account.cached_data,
+        "torrents": [t.project(projection) if projection else t.to_dict() for t in page],
+        "filtered_count": filtered_count,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset if next_offset < filtered_count else None,
+        "warming": is_warming(account),
+        "account": account.name,
+    }
+    if not include_categories:
+        result.pop("categories", None)
+    return result
 
 
 @app.get("/api/torrents")
 async def api_torrents(
+    request: Request,
     discount: Optional[str] = Query(None, description="筛选优惠类型: FREE, _2X_FREE"),
     min_size: Optional[int] = Query(None, description="最小大小(字节)"),
     max_size: Optional[int] = Query(None, description="最大大小(字节)"),
     category: Optional[str] = Query(None, description="类别ID"),
-    mode: Optional[str] = Query(None, description="频道: normal, adult")
+    mode: Optional[str] = Query(None, description="频道: normal, adult"),
+    min_seeders: Optional[int] = Query(None, description="最少做种数"),
+    max_seeders: Optional[int] = Query(None, description="最多做种数"),
+    min_remaining: Optional[float] = Query(None, description="最少剩余免费时间(小时)"),
+    max_remaining: Optional[float] = Query(None, description="最多剩余免费时间(小时)，永久免费不计入"),
+    user_status: Optional[str] = Query(None, description="用户状态: none, seeding, leeching"),
+    sort: str = Query("remaining", description="排序字段: remaining, size, seeders, created"),
+    order: str = Query("asc", description="排序方向: asc, desc"),
+    limit: Optional[int] = Query(None, ge=1, le=TORRENTS_MAX_LIMIT, description="每页数量，不传则返回全部"),
+    offset: int = Query(0, ge=0, description="起始位置"),
+    fields: Optional[str] = Query(None, description="只返回指定字段，逗号分隔，如 id,name,remaining"),
+    include_categories: bool = Query(True, description="是否返回类别映射"),
+    account: Optional[str] = Query(None, description="账号名，默认为第一个账号")
 ):
-    """API 接口返回 JSON 数据，支持筛选"""
-    torrents = cached_data.get("torrents", [])
-
-    if discount:
-        torrents = [t for t in torrents if t["discount"] == discount]
-    if min_size is not None:
-        torrents = [t for t in torrents if t["size"] >= min_size]
-    if max_size is not None:
-        torrents = [t for t in torrents if t["size"] <= max_size]
-    if category:
-        torrents = [t for t in torrents if str(t["category"]) == category]
-    if mode:
-        torrents = [t for t in torrents if t["mode"] == mode]
-
-    return {
-        **cached_data,
-        "torrents": torrents,
-        "filtered_count": len(torrents)
-    }
+    """API 接口返回 JSON 数据，支持筛选、排序、分页和字段投影（基于列式索引，不做全表扫描）"""
+    current = resolve_account(account)
+    projection = None
+    if fields:
+        projection = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in projection if f not in TorrentRecord.API_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+
+    # 排序参数先归一化再校验，非法值返回 400，不同写法共用一个缓存条目
+    sort = sort.strip().lower()
+    order = order.strip().lower()
+    if sort not in TorrentIndex.SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"未知排序字段: {sort}（可选: {', '.join(TorrentIndex.SORT_KEYS)}）")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail=f"未知排序方向: {order}（可选: asc, desc）")
+
+    cache_key = (
+        "/api/torrents", discount, min_size, max_size, category, mode, min_seeders, max_seeders,
+        min_remaining, max_remaining, user_status, sort, order, limit, offset,
+        tuple(projection) if projection else None, include_categories,
+    )
+    return cached_response(request, current, cache_key, lambda: encode_json(query_torrents(
+        current,
+        discount=discount,
+        mode=mode,
+        category=category,
+        user_status=user_status,
+        min_size=min_size,
+        max_size=max_size,
+        min_seeders=min_seeders,
+        max_seeders=max_seeders,
+        min_remaining=min_remaining,
+        max_remaining=max_remaining,
+        sort=sort,
+        descending=order == "desc",
+        limit=limit,
+        offset=offset,
+        projection=projection,
+        include_categories=include_categories,
+    )))
 
 
 @app.post("/api/refresh")
-async def api_refresh(request: Request):
+async def api_refresh(request: Request, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
     """手动触发刷新"""
+    current = resolve_account(account)
+
     # Rate limiting
     client_ip = request.client.host if request.client else "unknown"
     if not check_rate_limit(client_ip):
         raise HTTPException(status_code=429, detail="Too many requests. Please wait.")
 
-    await fetch_all_free_torrents()
+    # 手动刷新总是重新抓取搜索结果，新结果同样供其他账号复用
+    await fetch_all_free_torrents(current, force_search=True)
     return {"status": "ok", "message": "刷新完成"}
 
 
 @app.post("/api/collection")
-async def api_collection(request: Request, data: CollectionRequest):
+async def api_collection(request: Request, data: CollectionRequest, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
     """收藏/取消收藏种子"""
+    current = resolve_account(account)
+
     # Rate limiting
     client_ip = request.client.host if request.client else "unknown"
     if not check_rate_limit(client_ip):
         raise HTTPException(status_code=429, detail="Too many requests. Please wait.")
 
-    return await toggle_collection(data.id, data.make)
+    return await toggle_collection(current, data.id, data.make)
 
 
 @app.post("/api/auto-delete/toggle")
-async def api_auto_delete_toggle(request: Request):
-    """切换自动删除功能"""
-    global auto_delete_enabled
+async def api_auto_delete_toggle(request: Request, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """切换账号的自动删除功能"""
+    current = resolve_account(account)
 
     # Rate limiting
     client_ip = request.client.host if request.client else "unknown"
@@ -1338,39 +3340,254 @@ async def api_auto_delete_toggle(request: Request):
         raise HTTPException(status_code=429, detail="Too many requests. Please wait.")
 
     # Toggle the state
-    auto_delete_enabled = not auto_delete_enabled
+    current.auto_delete_enabled = not current.auto_delete_enabled
+    current.mark_dirty("auto_delete_enabled")
 
-    logger.info(f"自动删除功能已{'启用' if auto_delete_enabled else '禁用'}")
+    logger.info(f"[{current.name}] 自动删除功能已{'启用' if current.auto_delete_enabled else '禁用'}")
 
     return {
         "success": True,
-        "enabled": auto_delete_enabled,
-        "message": f"自动删除已{'启用' if auto_delete_enabled else '禁用'}"
+        "enabled": current.auto_delete_enabled,
+        "message": f"自动删除已{'启用' if current.auto_delete_enabled else '禁用'}"
     }
 
 
 @app.get("/api/auto-delete/status")
-async def api_auto_delete_status():
-    """获取自动删除功能状态"""
+async def api_auto_delete_status(account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """获取账号的自动删除功能状态"""
+    current = resolve_account(account)
+    return {
+        "enabled": current.auto_delete_enabled,
+        "qbittorrent_configured": current.qb.configured
+    }
+
+
+@app.get("/api/qbittorrent/torrents")
+async def api_qbittorrent_torrents(account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """获取账号的 qBittorrent 状态镜像（仅返回已同步的本地数据，不触发请求）"""
+    qb = resolve_account(account).qb
+    torrents = [
+        {
+            "hash": torrent_hash,
+            "name": torrent.get("name", ""),
+            "state": torrent.get("state", ""),
+            "progress": torrent.get("progress", 0),
+            "size": torrent.get("size", 0),
+            "mteam_id": qb.hash_to_mteam.get(torrent_hash),
+        }
+        for torrent_hash, torrent in qb.torrents.items()
+    ]
+    return {
+        "torrents": torrents,
+        "total": len(torrents),
+        "rid": qb.sync_rid,
+        "last_sync": datetime.fromtimestamp(qb.synced_at, BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S") if qb.synced_at else None
+    }
+
+
+@app.get("/api/qbittorrent/summary")
+async def api_qbittorrent_summary(account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """获取 qBittorrent 状态镜像的汇总（种子数、下载中、做种中、M-Team 种子数），仪表盘导航栏使用"""
+    return qb_mirror_summary(resolve_account(account).qb)
+
+
+@app.get("/api/stats")
+async def api_stats(account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """获取运行统计：内存占用（各常驻数据结构的大小与进程 RSS）、最近一次各搜索组合的抓取统计及刷新各阶段耗时"""
+    current = resolve_account(account)
     return {
-        "enabled": auto_delete_enabled,
-        "qbittorrent_configured": bool(QBITTORRENT_URL and QBITTORRENT_USER and QBITTORRENT_PASSWORD)
+        "memory": get_memory_stats(current),
+        "search": current.search_stats,
+        "refresh_stages": current.refresh_stage_stats,
     }
 
 
 @app.get("/api/categories")
-async def api_categories():
+async def api_categories(request: Request, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
     """获取类别列表"""
-    return {"categories": cached_data.get("categories", [])}
+    current = resolve_account(account)
+    return cached_response(
+        request, current, ("/api/categories",),
+        lambda: encode_json({"categories": current.cached_data.get("categories", [])})
+    )
+
+
+@app.get("/api/accounts")
+async def api_accounts():
+    """列出已配置的账号（第一个为默认账号）"""
+    return {"accounts": [
+        {
+            "name": current.name,
+            "ready": is_ready(current),
+            "warming": is_warming(current),
+            "last_update": current.cached_data.get("last_update"),
+            "torrents_count": current.cached_data.get("total", 0),
+            "auto_delete_enabled": current.auto_delete_enabled,
+            "qbittorrent_configured": current.qb.configured,
+            "refresh_interval": current.refresh_interval,
+        }
+        for current in accounts.values()
+    ]}
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """
+    Server-Sent Events 推送
+
+    事件类型：snapshot（每次刷新完成后的增量：added/changed/removed，或 reset 表示需重新拉取）、
+    alert（免费即将到期/免费失效）、auto_delete（自动删除结果）。只推送所选账号的事件。
+    """
+    current = resolve_account(account)
+    queue = current.event_broker.subscribe()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers.")
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            yield encode_sse(
+                "hello", {"version": current.snapshot_version, "warming": is_warming(current)}, current.snapshot_version
+            )
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            current.event_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/profile")
+async def api_profile(request: Request, account: Optional[str] = Query(None, description="账号名，默认为第一个账号")):
+    """获取用户与对手的分享率资料"""
+    current = resolve_account(account)
+    return cached_response(
+        request, current, ("/api/profile",),
+        lambda: encode_json({"user_profile": current.user_profile, "rival_profile": current.rival_profile})
+    )
+
+
+def leeching_remaining_hours(account: "Account") -> Dict[str, List[float]]:
+    """账号下载中种子按优惠分组的剩余免费时间（小时）；非免费种子只计数"""
+    result: Dict[str, List[float]] = {"free": [], "paid": []}
+    for leeching_info in account.user_torrent_status.get("leeching", {}).values():
+        status_info = (leeching_info.get("torrent") or {}).get("status") or {}
+        if not is_free_discount(status_info.get("discount")):
+            result["paid"].append(0.0)
+            continue
+        end_time = parse_datetime(status_info.get("discountEndTime"))
+        result["free"].append(calculate_remaining_time(end_time)["hours"] if end_time else float("inf"))
+    return result
+
+
+def render_metrics() -> str:
+    """Prometheus 文本格式的全部指标"""
+    lines: List[str] = []
+    for metric in (
+        MT_REQUEST_SECONDS, MT_SCHEDULER_WAIT_SECONDS, MT_RATE_LIMITED, MT_REQUEST_ERRORS, MT_PAGES_FETCHED,
+        SEARCH_SECONDS, QB_LOOKUP_SECONDS, QB_DELETE_SECONDS, EMERGENCY_CHECK_SECONDS,
+        REFRESH_SECONDS, REFRESH_STAGE_SECONDS, ALERTS, HTTP_RATE_LIMITED,
+    ):
+        lines.extend(metric.render())
+
+    # 账号级指标：每个账号一组样本，带 account 标签
+    leeching_counts: Dict[Tuple, float] = {}
+    remaining_buckets: Dict[Tuple, float] = {}
+    for current in accounts.values():
+        leeching = leeching_remaining_hours(current)
+        label = ("account", current.name)
+        leeching_counts[(label, ("discount", "free"))] = len(leeching["free"])
+        leeching_counts[(label, ("discount", "paid"))] = len(leeching["paid"])
+        remaining = sorted(leeching["free"])
+        for bound in LEECHING_REMAINING_BUCKETS:
+            remaining_buckets[(label, ("le", f"{bound:g}"))] = bisect.bisect_right(remaining, bound)
+        remaining_buckets[(label, ("le", "+Inf"))] = len(remaining)
+    lines.extend(render_samples("leeching_torrents", "Torrents currently leeching, by discount", leeching_counts))
+    lines.extend(render_samples(
+        "leeching_free_remaining_hours",
+        "Leeching free torrents with remaining free time at or below le hours (cumulative)",
+        remaining_buckets,
+    ))
+
+    def per_account(value: Callable[["Account"], float]) -> Dict[Tuple, float]:
+        return {(("account", current.name),): value(current) for current in accounts.values()}
+
+    lines.extend(render_samples(
+        "cached_torrents", "Torrents in the current snapshot",
+        per_account(lambda a: len(a.cached_data.get("torrents", [])))
+    ))
+    lines.extend(render_samples(
+        "snapshot_version", "Snapshot version, bumped on every refresh", per_account(lambda a: a.snapshot_version)
+    ))
+    lines.extend(render_samples(
+        "last_refresh_timestamp_seconds", "Unix time the last refresh completed",
+        per_account(lambda a: a.last_refresh_completed_at or 0)
+    ))
+    lines.extend(render_samples(
+        "known_free_torrents", "Tracked historically free torrent IDs", per_account(lambda a: len(a.known_free_torrent_ids))
+    ))
+    lines.extend(render_samples(
+        "qbittorrent_index_size", "Torrents in the qBittorrent index", per_account(lambda a: len(a.qb.hash_to_mteam))
+    ))
+    lines.extend(render_samples(
+        "stream_subscribers", "Connected /api/stream clients", per_account(lambda a: len(a.event_broker))
+    ))
+    lines.extend(render_samples("response_cache_requests_total", "Response cache lookups since start", {
+        (("result", "hit"),): response_cache.hits,
+        (("result", "miss"),): response_cache.misses,
+    }, metric_type="counter"))
+    lines.extend(render_samples("search_cache_requests_total", "Shared search result lookups since start", {
+        (("result", "hit"),): search_cache.hits,
+        (("result", "joined"),): search_cache.joined,
+        (("result", "miss"),): search_cache.misses,
+    }, metric_type="counter"))
+    lines.extend(render_samples(
+        "auto_delete_enabled", "Whether auto-delete is enabled", per_account(lambda a: int(a.auto_delete_enabled))
+    ))
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 指标"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/health")
 async def health_check():
-    """健康检查接口"""
+    """健康检查接口（存活检查：进程可响应即返回 ok；torrents_count 为默认账号的种子数）"""
+    default = get_account()
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
-        "torrents_count": cached_data.get("total", 0)
+        "torrents_count": default.cached_data.get("total", 0),
+        "ready": all(is_ready(current) for current in accounts.values()),
+        "warming": any(is_warming(current) for current in accounts.values()),
+        "persistence": state_store.status,
+        "persistence_error": state_store.error
+    }
+
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """就绪检查接口：任一账号首次刷新完成或恢复快照前返回 503"""
+    ready = all(is_ready(current) for current in accounts.values())
+    if not ready:
+        response.status_code = 503
+    return {
+        "ready": ready,
+        "warming": any(is_warming(current) for current in accounts.values()),
+        "last_update": get_account().cached_data.get("last_update"),
+        "accounts": {
+            current.name: {"ready": is_ready(current), "last_update": current.cached_data.get("last_update")}
+            for current in accounts.values()
+        }
     }
 
 
@@ -0,0 +1,254 @@
+"""
+合成的 M-Team / qBittorrent 接口数据
+
+按固定随机种子生成，同样的参数每次得到完全相同的数据，便于跨提交对比基准结果。
+处理函数与传输层无关：handle() 接收方法、路径、查询参数和请求体，返回 (状态码, 响应体, 响应头)，
+可以挂到 httpx.MockTransport 上在进程内回放，也可以包装成独立的 HTTP 服务。
+"""
+
+import base64
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import httpx
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 各搜索组合占全部免费种子的比例
+SEARCH_SHARES = {
+    ("FREE", "normal"): 0.40,
+    ("_2X_FREE", "normal"): 0.20,
+    ("FREE", "adult"): 0.25,
+    ("_2X_FREE", "adult"): 0.15,
+}
+
+Reply = Tuple[int, Any, Dict[str, str]]
+
+
+def _page(items: List[Any], body: Dict[str, Any]) -> Dict[str, Any]:
+    """按 pageNumber / pageSize 切分列表，返回 M-Team 分页结构"""
+    page_size = max(1, int(body.get("pageSize") or 100))
+    page_number = max(1, int(body.get("pageNumber") or 1))
+    start = (page_number - 1) * page_size
+    return {
+        "pageNumber": str(page_number),
+        "pageSize": str(page_size),
+        "total": str(len(items)),
+        "totalPages": str(-(-len(items) // page_size) or 1),
+        "data": items[start:start + page_size],
+    }
+
+
+def _ok(data: Any) -> Dict[str, Any]:
+    return {"code": "0", "message": "SUCCESS", "data": data}
+
+
+def parse_body(content: bytes, content_type: str) -> Dict[str, Any]:
+    """解析 JSON 或表单请求体"""
+    if not content:
+        return {}
+    if "json" in content_type:
+        return json.loads(content)
+    return {key: values[-1] for key, values in parse_qs(content.decode()).items()}
+
+
+class SyntheticMTeam:
+    """
+    M-Team API 的合成数据
+
+    Args:
+        torrents: 免费种子总数（按 SEARCH_SHARES 分到四个搜索组合）
+        seeding: 做种中的种子数（取自免费种子）
+        leeching: 下载中的种子数（取自免费种子，其中 expiring 个剩余不到 10 分钟）
+        collection: 收藏数
+        seed: 随机种子
+    """
+
+    def __init__(
+        self,
+        torrents: int = 10000,
+        seeding: int = 3000,
+        leeching: int = 200,
+        expiring: int = 5,
+        collection: int = 300,
+        seed: int = 20240101,
+        now: Optional[datetime] = None,
+    ):
+        rng = random.Random(seed)
+        now = now or datetime.now(BEIJING_TZ).replace(tzinfo=None)
+
+        self.search: Dict[Tuple[str, str], List[Dict[str, Any]]] = {combo: [] for combo in SEARCH_SHARES}
+        self.torrents: List[Dict[str, Any]] = []
+        combos = list(SEARCH_SHARES)
+        weights = [SEARCH_SHARES[combo] for combo in combos]
+        for index in range(torrents):
+            torrent_id = 900000 + index
+            discount, mode = rng.choices(combos, weights)[0]
+            if rng.random() < 0.05:
+                end_time = None
+            else:
+                end_time = (now + timedelta(minutes=rng.randint(30, 7 * 24 * 60))).strftime(DATETIME_FORMAT)
+            item = {
+                "id": str(torrent_id),
+                "name": f"Synthetic.Torrent.{torrent_id}.2160p.WEB-DL.H265-BENCH",
+                "smallDescr": f"合成种子 {torrent_id}" if rng.random() < 0.7 else "",
+                "size": str(rng.randint(200 * 1024 ** 2, 200 * 1024 ** 3)),
+                "category": str(rng.randint(401, 440)),
+                "createdDate": (now - timedelta(minutes=rng.randint(1, 30 * 24 * 60))).strftime(DATETIME_FORMAT),
+                "status": {
+                    "discount": discount,
+                    "discountEndTime": end_time,
+                    "seeders": str(int(rng.paretovariate(1.2))),
+                    "leechers": str(rng.randint(0, 50)),
+                },
+            }
+            self.torrents.append(item)
+            self.search[(discount, mode)].append(item)
+
+        picked = rng.sample(self.torrents, min(len(self.torrents), seeding + leeching))
+        self.seeding = [{"torrent": item, "peer": {"uploaded": "0"}} for item in picked[:seeding]]
+        self.leeching = []
+        for position, item in enumerate(picked[seeding:]):
+            item = json.loads(json.dumps(item))
+            if position < expiring:
+                item["status"]["discountEndTime"] = (now + timedelta(minutes=5)).strftime(DATETIME_FORMAT)
+            downloaded = int(int(item["size"]) * rng.uniform(0.05, 0.95))
+            self.leeching.append({"torrent": item, "peer": {"downloaded": str(downloaded)}})
+        self.collection = [{"id": item["id"]} for item in rng.sample(self.torrents, min(len(self.torrents), collection))]
+        self.categories = [{"id": str(c), "nameChs": f"类别{c}", "nameEng": f"Category {c}"} for c in range(401, 441)]
+
+    @property
+    def client_ids(self) -> List[str]:
+        """用户做种和下载中的种子 ID（qBittorrent 中应有的 M-Team 种子）"""
+        return [entry["torrent"]["id"] for entry in self.seeding + self.leeching]
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Reply:
+        """处理一个 M-Team API 请求（path 为 /api 之后的部分，如 /torrent/search）"""
+        if path == "/torrent/search":
+            items = self.search.get((body.get("discount"), body.get("mode", "normal")), [])
+            return 200, _ok(_page(items, body)), {}
+        if path == "/member/getUserTorrentList":
+            items = self.seeding if body.get("type") == "SEEDING" else self.leeching
+            return 200, _ok(_page(items, body)), {}
+        if path == "/member/collection":
+            return 200, _ok(_page(self.collection, body)), {}
+        if path == "/member/profile":
+            uid = int(body.get("uid") or 0)
+            uploaded, downloaded = (uid % 97 + 3) * 1024 ** 4, (uid % 89 + 1) * 1024 ** 4
+            return 200, _ok({"memberCount": {"uploaded": str(uploaded), "downloaded": str(downloaded),
+                                             "shareRate": f"{uploaded / downloaded:.3f}"}}), {}
+        if path == "/torrent/collection":
+            return 200, _ok(None), {}
+        if path == "/torrent/categoryList":
+            return 200, _ok(self.categories), {}
+        return 404, {"code": "404", "message": f"unknown endpoint {path}"}, {}
+
+
+class SyntheticQBittorrent:
+    """
+    qBittorrent Web API 的合成数据
+
+    Args:
+        mteam_ids: 客户端中的 M-Team 种子 ID
+        total: 客户端种子总数（不足部分为其他站点的种子）
+        tracker_field_ratio: maindata 中 tracker 字段已包含 M-Team 地址的比例，其余需单独查询 tracker 列表
+        remove_on_delete: 删除请求是否真的移除种子（之后的 maindata 增量会带上 torrents_removed）；
+            基准测试保持 False，使每轮数据相同
+    """
+
+    SID = "benchsid"
+
+    def __init__(
+        self,
+        mteam_ids: List[str],
+        total: int = 5000,
+        tracker_field_ratio: float = 0.8,
+        seed: int = 20240101,
+        remove_on_delete: bool = False,
+    ):
+        rng = random.Random(seed + 1)
+        self.torrents: Dict[str, Dict[str, Any]] = {}
+        self.trackers: Dict[str, str] = {}
+        self.deleted: List[str] = []
+        self.remove_on_delete = remove_on_delete
+        self.rid = 1
+        self._removed_at: Dict[str, int] = {}  # {hash: 移除时的 rid}
+
+        ids: List[Optional[str]] = list(mteam_ids[:total])
+        ids += [None] * (total - len(ids))
+        for index, mteam_id in enumerate(ids):
+            torrent_hash = f"{rng.getrandbits(160):040x}"
+            if mteam_id:
+                credential = base64.b64encode(f"tid={mteam_id}&uid=1".encode()).decode()
+                tracker = f"https://tracker.m-team.cc/announce?credential={credential}"
+            else:
+                tracker = f"https://tracker.example.org/{index}/announce"
+            self.trackers[torrent_hash] = tracker
+            self.torrents[torrent_hash] = {
+                "name": f"client-torrent-{index}",
+                "state": "uploading" if rng.random() < 0.9 else "downloading",
+                "progress": 1.0 if rng.random() < 0.9 else round(rng.random(), 3),
+                "size": rng.randint(200 * 1024 ** 2, 200 * 1024 ** 3),
+                "tracker": tracker if rng.random() < tracker_field_ratio else "",
+            }
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]) -> Reply:
+        """处理一个 qBittorrent Web API 请求"""
+        if path == "/api/v2/auth/login":
+            return 200, "Ok.", {"set-cookie": f"SID={self.SID}; HttpOnly; path=/"}
+        if cookies.get("SID") != self.SID:
+            return 403, "Forbidden", {}
+        if path == "/api/v2/sync/maindata":
+            rid = int(query.get("rid") or 0)
+            if rid == 0 or rid > self.rid:
+                return 200, {"rid": self.rid, "full_update": True, "torrents": self.torrents}, {}
+            removed = [h for h, removed_rid in self._removed_at.items() if removed_rid > rid]
+            return 200, {"rid": self.rid, "torrents": {}, "torrents_removed": removed}, {}
+        if path == "/api/v2/torrents/info":
+            return 200, [{"hash": h, **t} for h, t in self.torrents.items()], {}
+        if path == "/api/v2/torrents/trackers":
+            tracker = self.trackers.get(query.get("hash", ""))
+            return 200, ([{"url": tracker, "status": 2}] if tracker else []), {}
+        if path == "/api/v2/torrents/delete":
+            hashes = [h for h in (body.get("hashes") or "").split("|") if h]
+            self.deleted.extend(hashes)
+            if self.remove_on_delete:
+                self.rid += 1
+                for torrent_hash in hashes:
+                    if self.torrents.pop(torrent_hash, None) is not None:
+                        self._removed_at[torrent_hash] = self.rid
+            return 200, "", {}
+        return 404, "Not Found", {}
+
+
+def _to_httpx(reply: Reply) -> httpx.Response:
+    status, payload, headers = reply
+    if isinstance(payload, str):
+        return httpx.Response(status, text=payload, headers=headers)
+    return httpx.Response(status, json=payload, headers=headers)
+
+
+def mteam_transport(mteam: SyntheticMTeam, api_prefix: str = "/api") -> httpx.MockTransport:
+    """把 SyntheticMTeam 挂到 httpx.MockTransport 上（进程内回放，不走网络）"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path[len(api_prefix):] if request.url.path.startswith(api_prefix) else request.url.path
+        body = parse_body(request.content, request.headers.get("content-type", ""))
+        return _to_httpx(mteam.handle(request.method, path, dict(request.url.params), body))
+    return httpx.MockTransport(handler)
+
+
+def qbittorrent_transport(qb: SyntheticQBittorrent) -> httpx.MockTransport:
+    """把 SyntheticQBittorrent 挂到 httpx.MockTransport 上"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        cookies = {}
+        for part in request.headers.get("cookie", "").split(";"):
+            if "=" in part:
+                key, value = part.strip().split("=", 1)
+                cookies[key] = value
+        body = parse_body(request.content, request.headers.get("content-type", ""))
+        return _to_httpx(qb.handle(request.method, request.url.path, dict(request.url.params), body, cookies))
+    return httpx.MockTransport(handler)
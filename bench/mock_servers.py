@@ -0,0 +1,188 @@
+"""
+本地 M-Team / qBittorrent 替身服务
+
+用 bench/fixtures.py 的合成数据提供真实的 HTTP 接口，可注入延迟、限流和服务端错误，
+用于压测和回归测试刷新、自动删除等路径。应用只需修改环境变量即可接入，无需改代码：
+
+    python -m bench.mock_servers --latency 0.05 --rate-limit-ratio 0.05
+    MT_API_BASE=http://127.0.0.1:8081/api MT_TOKEN=mock MT_USER_ID=1 \\
+    QBITTORRENT_URL=http://127.0.0.1:8082 QBITTORRENT_USER=mock QBITTORRENT_PASSWORD=mock \\
+    python -m uvicorn app.main:app --port 5001
+
+M-Team 接口：torrent/search、torrent/categoryList、torrent/collection、member/getUserTorrentList、
+member/collection、member/profile；qBittorrent 接口：auth/login、sync/maindata、torrents/info、
+torrents/trackers、torrents/delete。
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Callable, Dict
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from bench.fixtures import SyntheticMTeam, SyntheticQBittorrent, parse_body
+
+
+class Faults:
+    """
+    故障注入配置
+
+    Args:
+        latency: 每个请求的基础延迟（秒）
+        jitter: 在基础延迟上随机增加 0~jitter 秒
+        rate_limit_ratio: 按比例返回限流响应（仅 M-Team）
+        error_ratio: 按比例返回 500
+        seed: 随机种子（同样的请求序列得到同样的故障序列）
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        error_ratio: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.error_ratio = error_ratio
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    async def delay(self) -> None:
+        seconds = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def roll(self, ratio: float) -> bool:
+        return ratio > 0 and self._rng.random() < ratio
+
+
+def _response(status: int, payload: Any, headers: Dict[str, str]) -> Response:
+    if isinstance(payload, str):
+        response: Response = PlainTextResponse(payload, status_code=status)
+    else:
+        response = JSONResponse(payload, status_code=status)
+    for key, value in headers.items():
+        response.headers.append(key, value)
+    return response
+
+
+def _stats_endpoint(faults: Faults) -> Callable:
+    """/_mock/stats：已处理请求数和注入的故障数"""
+    async def stats(request: Request) -> Response:
+        return JSONResponse({
+            "requests": faults.requests,
+            "rate_limited": faults.rate_limited,
+            "errors": faults.errors,
+        })
+    return stats
+
+
+def build_mteam_app(mteam: SyntheticMTeam, faults: Faults) -> Starlette:
+    """M-Team 替身：所有接口位于 /api 之下，与 MT_API_BASE 的路径对应"""
+    async def endpoint(request: Request) -> Response:
+        faults.requests += 1
+        await faults.delay()
+        if faults.roll(faults.rate_limit_ratio):
+            faults.rate_limited += 1
+            return JSONResponse({"code": "1", "message": "請求過於頻繁 (too many requests)", "data": None})
+        if faults.roll(faults.error_ratio):
+            faults.errors += 1
+            return PlainTextResponse("Internal Server Error", status_code=500)
+
+        body = parse_body(await request.body(), request.headers.get("content-type", ""))
+        path = "/" + request.path_params["path"]
+        return _response(*mteam.handle(request.method, path, dict(request.query_params), body))
+
+    return Starlette(routes=[
+        Route("/_mock/stats", _stats_endpoint(faults)),
+        Route("/api/{path:path}", endpoint, methods=["GET", "POST"]),
+    ])
+
+
+def build_qbittorrent_app(qb: SyntheticQBittorrent, faults: Faults) -> Starlette:
+    """qBittorrent Web API 替身"""
+    async def endpoint(request: Request) -> Response:
+        faults.requests += 1
+        await faults.delay()
+        if faults.roll(faults.error_ratio):
+            faults.errors += 1
+            return PlainTextResponse("Internal Server Error", status_code=500)
+
+        body = parse_body(await request.body(), request.headers.get("content-type", ""))
+        return _response(*qb.handle(
+            request.method, request.url.path, dict(request.query_params), body, dict(request.cookies)
+        ))
+
+    async def deleted(request: Request) -> Response:
+        return JSONResponse({"deleted": qb.deleted, "remaining": len(qb.torrents)})
+
+    return Starlette(routes=[
+        Route("/_mock/stats", _stats_endpoint(faults)),
+        Route("/_mock/deleted", deleted),
+        Route("/api/v2/{path:path}", endpoint, methods=["GET", "POST"]),
+    ])
+
+
+async def serve(args: argparse.Namespace) -> None:
+    mteam = SyntheticMTeam(
+        torrents=args.torrents, seeding=args.seeding, leeching=args.leeching,
+        expiring=args.expiring, seed=args.seed,
+    )
+    qb = SyntheticQBittorrent(
+        mteam.client_ids, total=args.client_torrents, seed=args.seed, remove_on_delete=True,
+    )
+    mteam_faults = Faults(args.latency, args.jitter, args.rate_limit_ratio, args.error_ratio, args.seed)
+    qb_faults = Faults(args.qb_latency, args.jitter, 0.0, args.qb_error_ratio, args.seed)
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(
+            build_mteam_app(mteam, mteam_faults),
+            host=args.host, port=args.mteam_port, log_level=args.log_level,
+        )),
+        uvicorn.Server(uvicorn.Config(
+            build_qbittorrent_app(qb, qb_faults),
+            host=args.host, port=args.qb_port, log_level=args.log_level,
+        )),
+    ]
+    print(json.dumps({
+        "MT_API_BASE": f"http://{args.host}:{args.mteam_port}/api",
+        "QBITTORRENT_URL": f"http://{args.host}:{args.qb_port}",
+    }, indent=2))
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="本地 M-Team / qBittorrent 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--mteam-port", type=int, default=8081)
+    parser.add_argument("--qb-port", type=int, default=8082)
+    parser.add_argument("--torrents", type=int, default=10000, help="免费种子数（决定搜索页数：每页 200 个，按比例分到四个搜索组合）")
+    parser.add_argument("--client-torrents", type=int, default=5000, help="qBittorrent 中的种子数")
+    parser.add_argument("--seeding", type=int, default=3000, help="做种中的种子数")
+    parser.add_argument("--leeching", type=int, default=200, help="下载中的种子数")
+    parser.add_argument("--expiring", type=int, default=5, help="免费剩余不到 10 分钟的下载中种子数")
+    parser.add_argument("--latency", type=float, default=0.0, help="M-Team 每个请求的延迟（秒）")
+    parser.add_argument("--qb-latency", type=float, default=0.0, help="qBittorrent 每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机附加延迟上限（秒）")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="M-Team 返回限流的比例")
+    parser.add_argument("--error-ratio", type=float, default=0.0, help="M-Team 返回 500 的比例")
+    parser.add_argument("--qb-error-ratio", type=float, default=0.0, help="qBittorrent 返回 500 的比例")
+    parser.add_argument("--seed", type=int, default=20240101, help="随机种子")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,238 @@
+"""
+离线基准测试
+
+用 bench/fixtures.py 的合成数据在进程内回放 M-Team 和 qBittorrent 接口（不访问网络），
+对刷新流水线和各热点路径计时。M-Team 请求的限速间隔被排除在外，只衡量本地处理开销。
+
+用法（在仓库根目录执行）:
+    python -m bench.run
+    python -m bench.run --torrents 10000 --client-torrents 5000 --repeat 5 --json bench-results.json
+    python -m bench.run --compare bench-results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+QB_URL = "http://qbittorrent.bench"
+
+# app.main 在导入时读取配置，必须先设置环境变量
+os.environ.update({
+    "MT_TOKEN": "bench-token",
+    "MT_USER_ID": "1",
+    "RIVAL_USER_ID": "2",
+    "QBITTORRENT_URL": QB_URL,
+    "QBITTORRENT_USER": "bench",
+    "QBITTORRENT_PASSWORD": "bench",
+    "STATE_DB_PATH": "",
+    "PUSHPLUS_TOKEN": "",
+})
+
+from app import main  # noqa: E402
+from bench.fixtures import (  # noqa: E402
+    SyntheticMTeam, SyntheticQBittorrent, mteam_transport, qbittorrent_transport,
+)
+
+# /api/torrents 筛选基准使用的查询组合
+QUERY_CASES = [
+    {},
+    {"discount": "FREE"},
+    {"mode": "adult", "sort": "size", "descending": True},
+    {"min_size": 10 * 1024 ** 3, "max_size": 50 * 1024 ** 3, "min_seeders": 5},
+    {"max_remaining": 6, "user_status": "none"},
+    {"category": "410", "sort": "seeders", "descending": True},
+]
+
+
+# 基准测试只使用由环境变量组成的默认账号
+account = main.get_account()
+
+
+def reset_qb_index() -> None:
+    account.qb.torrents.clear()
+    main.qb_index_clear(account.qb)
+    account.qb.sync_rid = 0
+
+
+def reset_state() -> None:
+    """清空上一轮留下的运行时状态，保证每轮从同样的起点开始"""
+    account.cached_data = {"torrents": [], "categories": [], "last_update": None, "error": None}
+    account.user_torrent_status = {"seeding": {}, "leeching": {}}
+    account.user_collection_ids = set()
+    account.sent_alerts = main.AlertCooldownTracker(main.ALERT_COOLDOWNS, main.ALERT_COOLDOWN)
+    account.known_free_torrent_ids = main.ExpiringSet(ttl=main.KNOWN_FREE_TTL, max_size=main.KNOWN_FREE_MAX)
+    reset_qb_index()
+    main.response_cache.clear()
+    main.search_cache.clear()
+
+
+async def time_runs(repeat: int, setup: Optional[Callable[[], Any]], fn: Callable[[], Awaitable[Any]]) -> List[float]:
+    """执行 repeat 次，返回每次耗时（秒）；setup 不计时"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start_time = time.perf_counter()
+        await fn()
+        runs.append(time.perf_counter() - start_time)
+    return runs
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, List[float]]:
+    mteam = SyntheticMTeam(torrents=args.torrents, seeding=args.seeding, leeching=args.leeching)
+    qb = SyntheticQBittorrent(mteam.client_ids, total=args.client_torrents)
+
+    account.scheduler = main.MTeamScheduler(rate=1e6, capacity=10 ** 6)
+    main.http_client = httpx.AsyncClient(transport=mteam_transport(mteam))
+    account.qb._client = httpx.AsyncClient(base_url=QB_URL, transport=qbittorrent_transport(qb))
+    account.auto_delete_enabled = True
+    app_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+
+    results: Dict[str, List[float]] = {}
+
+    # 端到端刷新：搜索、用户状态、收藏、资料、qB 索引、处理、紧急检查（含批量删除）
+    results["fetch_all_free_torrents"] = await time_runs(
+        args.repeat, reset_state, lambda: main.fetch_all_free_torrents(account)
+    )
+    # 搜索阶段：完整抓取，以及同一轮中后刷新的账号复用共享结果
+    results["search_crawl"] = await time_runs(
+        args.repeat, main.search_cache.clear, lambda: main.search_all_free_torrents(account)
+    )
+    results["search_shared"] = await time_runs(args.repeat, None, lambda: main.search_all_free_torrents(account))
+
+    search_items = [(item, discount, mode) for (discount, mode), items in mteam.search.items() for item in items]
+
+    async def process_all() -> None:
+        for item, discount, mode in search_items:
+            main.process_torrent(account, item, discount, mode)
+    results["process_torrent"] = await time_runs(args.repeat, None, process_all)
+
+    records = account.cached_data["torrents"]
+
+    async def build_index() -> None:
+        main.TorrentIndex(records)
+    results["torrent_index_build"] = await time_runs(args.repeat, None, build_index)
+
+    async def query_all() -> None:
+        for case in QUERY_CASES:
+            main.encode_json(main.query_torrents(account, limit=None, offset=0, projection=None, include_categories=True, **case))
+    results["api_torrents_query"] = await time_runs(args.repeat, None, query_all)
+
+    async def get(url: str) -> None:
+        response = await app_client.get(url)
+        response.raise_for_status()
+
+    results["api_torrents_http_uncached"] = await time_runs(
+        args.repeat, main.response_cache.clear, lambda: get("/api/torrents?discount=FREE&limit=100")
+    )
+    results["api_torrents_http_cached"] = await time_runs(
+        args.repeat, None, lambda: get("/api/torrents?discount=FREE&limit=100")
+    )
+    results["dashboard_render"] = await time_runs(args.repeat, main.response_cache.clear, lambda: get("/"))
+
+    results["qb_sync_index_full"] = await time_runs(args.repeat, reset_qb_index, lambda: main.qb_sync_index(account))
+    results["qb_sync_index_incremental"] = await time_runs(args.repeat, None, lambda: main.qb_sync_index(account))
+
+    lookup_ids = mteam.client_ids[:1000]
+
+    async def lookup_all() -> None:
+        for mteam_id in lookup_ids:
+            await main.qb_find_torrent_by_mteam_id(account, mteam_id, sync=False)
+    results["qb_lookup_1000"] = await time_runs(args.repeat, None, lookup_all)
+
+    await app_client.aclose()
+    await main.http_client.aclose()
+    await account.qb.aclose()
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(results: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+        for name, runs in results.items()
+    }
+
+
+def print_table(summary: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    header = f"{'benchmark':<30} {'min (ms)':>10} {'median (ms)':>12}"
+    if baseline:
+        header += f" {'baseline (ms)':>14} {'change':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in summary.items():
+        line = f"{name:<30} {stats['min'] * 1000:>10.2f} {stats['median'] * 1000:>12.2f}"
+        if baseline:
+            base = baseline.get(name)
+            if base:
+                change = (stats["median"] / base["median"] - 1) * 100 if base["median"] else 0.0
+                line += f" {base['median'] * 1000:>14.2f} {change:>+7.1f}%"
+            else:
+                line += f" {'-':>14} {'-':>8}"
+        print(line)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="MT-Free-Hunter 离线基准测试")
+    parser.add_argument("--torrents", type=int, default=10000, help="合成免费种子数")
+    parser.add_argument("--client-torrents", type=int, default=5000, help="qBittorrent 中的种子数")
+    parser.add_argument("--seeding", type=int, default=3000, help="做种中的种子数")
+    parser.add_argument("--leeching", type=int, default=200, help="下载中的种子数")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数（报告最小值和中位数）")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", metavar="PATH", help="与之前保存的 JSON 结果对比中位数")
+    args = parser.parse_args()
+
+    # 日志输出会干扰计时
+    logging.getLogger().setLevel(logging.WARNING)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+    main.logger.setLevel(logging.WARNING)
+
+    results = asyncio.run(run_benchmarks(args))
+    summary = summarize(results)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_table(summary, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "torrents": args.torrents,
+                    "client_torrents": args.client_torrents,
+                    "seeding": args.seeding,
+                    "leeching": args.leeching,
+                    "repeat": args.repeat,
+                },
+                "results": summary,
+            }, f, indent=2)
+        print(f"\n结果已写入 {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main_cli()